@@ -3,40 +3,65 @@
 Check the latest crawl results
 """
 
-import json
 import os
+import heapq
+from array import array
+from collections import deque
 from datetime import datetime
 
+from results_loader import load_results
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 def check_latest_results():
     """Check the latest crawl results"""
     print("📊 LATEST CRAWL RESULTS ANALYSIS")
     print("=" * 50)
     
     # Find the latest results file
-    json_files = [f for f in os.listdir('.') if f.startswith('crawl_results_') and f.endswith('.json')]
+    with os.scandir('.') as entries:
+        json_files = [entry for entry in entries
+                      if entry.name.startswith('crawl_results_') and entry.name.endswith(('.json', '.jsonl'))]
     if not json_files:
         print("❌ No results files found")
         return
     
-    latest_file = max(json_files, key=os.path.getmtime)
+    latest_file = max(json_files, key=lambda entry: entry.stat().st_mtime).name
     print(f"📁 Latest file: {latest_file}")
     
     try:
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        stats = data.get('crawl_stats', {})
-        pages = data.get('pages', [])
+        stats, pages = load_results(latest_file)
         
         print(f"📄 Pages crawled: {stats.get('pages_crawled', 0):,}")
         print(f"❌ Errors: {stats.get('errors', 0):,}")
         print(f"⏱️  Start time: {stats.get('start_time', 'Unknown')}")
         print(f"⏱️  End time: {stats.get('end_time', 'Unknown')}")
         
-        if pages:
-            total_content = sum(len(page.get('content', '')) for page in pages)
-            avg_content = total_content / len(pages) if pages else 0
-            max_content = max(len(page.get('content', '')) for page in pages)
+        # Single pass over the pages, keeping only a compact int64 array of lengths
+        lengths = array('q')
+        recent_pages = deque(maxlen=5)
+        for page in pages:
+            content_len = page.get('content_length') or len(page.get('content', ''))
+            lengths.append(content_len)
+            recent_pages.append((page.get('url', 'Unknown'), page.get('title', 'No title'), content_len))
+        page_count = len(lengths)
+        
+        if page_count:
+            if np is not None:
+                # Zero-copy view of the array so the reductions run in C
+                arr = np.frombuffer(lengths, dtype=np.int64)
+                total_content = int(arr.sum())
+                max_content = int(arr.max())
+                top_count = min(10, page_count)
+                top_lengths = np.sort(np.partition(arr, -top_count)[-top_count:])[::-1].tolist()
+            else:
+                total_content = sum(lengths)
+                max_content = max(lengths)
+                top_lengths = heapq.nlargest(10, lengths)
+            avg_content = total_content / page_count
             
             print(f"\n📝 Content Analysis:")
             print(f"   Total content: {total_content:,} characters")
@@ -44,21 +69,15 @@ def check_latest_results():
             print(f"   Max content: {max_content:,} characters")
             
             # Show content length distribution
-            content_lengths = [len(page.get('content', '')) for page in pages]
-            content_lengths.sort(reverse=True)
-            
             print(f"\n📈 Content Distribution:")
             print(f"   Top 10 pages by content length:")
-            for i, length in enumerate(content_lengths[:10]):
+            for i, length in enumerate(top_lengths):
                 print(f"   {i+1:2d}. {length:,} characters")
             
             # Show recent pages
             print(f"\n🔗 Recent pages:")
-            for page in pages[-5:]:
-                url = page.get('url', 'Unknown')
-                title = page.get('title', 'No title')[:60]
-                content_len = len(page.get('content', ''))
-                print(f"  • {title} ({content_len:,} chars)")
+            for url, title, content_len in recent_pages:
+                print(f"  • {title[:60]} ({content_len:,} chars)")
                 print(f"    {url}")
         
         print("=" * 50)
@@ -4,41 +4,63 @@ Quick progress checker for USM crawler
 """
 
 import os
-import json
-import glob
+from array import array
+from collections import deque
 from datetime import datetime
 
+from results_loader import load_results
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 def check_progress():
     """Check the current crawling progress"""
     print("🔍 USM Crawl Progress Check")
     print("=" * 50)
     
     # Find the latest results file
-    json_files = glob.glob("usm_crawler/usm_crawl_results_*.json")
+    json_files = []
+    if os.path.isdir("usm_crawler"):
+        with os.scandir("usm_crawler") as entries:
+            json_files = [entry for entry in entries
+                          if entry.name.startswith('usm_crawl_results_') and entry.name.endswith('.json')]
     if not json_files:
         print("⏳ No results files found yet...")
         return
     
-    latest_file = max(json_files, key=os.path.getctime)
+    latest = max(json_files, key=lambda entry: entry.stat().st_ctime)
+    latest_file = latest.path
     
     try:
         # Read and display stats
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        stats, pages = load_results(latest_file)
         
-        stats = data.get('crawl_stats', {})
-        pages = data.get('pages', [])
+        # Single pass over the pages, keeping only a compact int64 array of lengths
+        lengths = array('q')
+        recent_pages = deque(maxlen=5)
+        for page in pages:
+            content_len = page.get('content_length') or len(page.get('content', ''))
+            lengths.append(content_len)
+            recent_pages.append((page.get('url', 'Unknown'), page.get('title', 'No title'), content_len))
+        page_count = len(lengths)
         
         print(f"📁 Latest file: {latest_file}")
         print(f"📄 Pages crawled: {stats.get('pages_crawled', 0):,}")
-        print(f"💾 Results saved: {len(pages):,}")
-        print(f"🕐 Last updated: {datetime.fromtimestamp(os.path.getmtime(latest_file)).strftime('%H:%M:%S')}")
+        print(f"💾 Results saved: {page_count:,}")
+        print(f"🕐 Last updated: {datetime.fromtimestamp(latest.stat().st_mtime).strftime('%H:%M:%S')}")
         
-        if pages:
-            # Calculate content stats
-            total_content = sum(len(page.get('content', '')) for page in pages)
-            avg_content = total_content / len(pages) if pages else 0
-            max_content = max(len(page.get('content', '')) for page in pages)
+        if page_count:
+            if np is not None:
+                # Zero-copy view of the array so the reductions run in C
+                arr = np.frombuffer(lengths, dtype=np.int64)
+                total_content = int(arr.sum())
+                max_content = int(arr.max())
+            else:
+                total_content = sum(lengths)
+                max_content = max(lengths)
+            avg_content = total_content / page_count
             
             print(f"📝 Total content: {total_content:,} characters")
             print(f"📊 Average content: {avg_content:.0f} characters")
@@ -46,11 +68,8 @@ def check_progress():
             
             # Show recent URLs
             print(f"\n🔗 Recent pages:")
-            for page in pages[-5:]:
-                url = page.get('url', 'Unknown')
-                title = page.get('title', 'No title')[:60]
-                content_len = len(page.get('content', ''))
-                print(f"  • {title} ({content_len:,} chars)")
+            for url, title, content_len in recent_pages:
+                print(f"  • {title[:60]} ({content_len:,} chars)")
                 print(f"    {url}")
         
         print("=" * 50)
@@ -5,10 +5,17 @@ Shows where results are stored and current progress
 """
 
 import os
-import json
-import glob
+from array import array
+from collections import deque
 from datetime import datetime
 
+from results_loader import load_results
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 def check_results():
     """Check the current crawling results"""
     print("📁 USM CRAWLER RESULTS LOCATION")
@@ -22,41 +29,53 @@ def check_results():
     
     print(f"📂 Results Directory: {os.path.abspath(results_dir)}")
     
-    # Find all JSON files
-    json_files = glob.glob(f"{results_dir}/*.json")
+    # Find all JSON files in one directory scan, stat-ing each entry once
+    with os.scandir(results_dir) as entries:
+        json_files = [(entry, entry.stat()) for entry in entries
+                      if entry.name.endswith('.json') and entry.is_file()]
     if not json_files:
         print("⏳ No results files found yet...")
         return
     
     # Sort by modification time
-    json_files.sort(key=os.path.getmtime, reverse=True)
+    json_files.sort(key=lambda item: item[1].st_mtime, reverse=True)
     
     print(f"\n📄 Found {len(json_files)} result files:")
-    for i, file in enumerate(json_files[:5]):  # Show last 5 files
-        file_size = os.path.getsize(file)
-        mod_time = datetime.fromtimestamp(os.path.getmtime(file))
-        print(f"  {i+1}. {os.path.basename(file)}")
-        print(f"     Size: {file_size:,} bytes")
+    for i, (entry, stat) in enumerate(json_files[:5]):  # Show last 5 files
+        mod_time = datetime.fromtimestamp(stat.st_mtime)
+        print(f"  {i+1}. {entry.name}")
+        print(f"     Size: {stat.st_size:,} bytes")
         print(f"     Modified: {mod_time.strftime('%Y-%m-%d %H:%M:%S')}")
     
     # Check the latest file
-    latest_file = json_files[0]
-    print(f"\n🔍 Latest Results: {os.path.basename(latest_file)}")
+    latest_file = json_files[0][0].path
+    print(f"\n🔍 Latest Results: {json_files[0][0].name}")
     
     try:
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        stats, pages = load_results(latest_file)
         
-        stats = data.get('crawl_stats', {})
-        pages = data.get('pages', [])
+        # Single pass over the pages, keeping only a compact int64 array of lengths
+        lengths = array('q')
+        recent_pages = deque(maxlen=3)
+        for page in pages:
+            content_len = page.get('content_length') or len(page.get('content', ''))
+            lengths.append(content_len)
+            recent_pages.append((page.get('url', 'Unknown'), page.get('title', 'No title'), content_len))
+        page_count = len(lengths)
         
         print(f"📊 Pages crawled: {stats.get('pages_crawled', 0):,}")
-        print(f"💾 Results saved: {len(pages):,}")
+        print(f"💾 Results saved: {page_count:,}")
         
-        if pages:
-            total_content = sum(len(page.get('content', '')) for page in pages)
-            avg_content = total_content / len(pages) if pages else 0
-            max_content = max(len(page.get('content', '')) for page in pages)
+        if page_count:
+            if np is not None:
+                # Zero-copy view of the array so the reductions run in C
+                arr = np.frombuffer(lengths, dtype=np.int64)
+                total_content = int(arr.sum())
+                max_content = int(arr.max())
+            else:
+                total_content = sum(lengths)
+                max_content = max(lengths)
+            avg_content = total_content / page_count
             
             print(f"📝 Total content: {total_content:,} characters")
             print(f"📊 Average content: {avg_content:.0f} characters")
@@ -64,11 +83,8 @@ def check_results():
             
             # Show recent URLs
             print(f"\n🔗 Recent pages:")
-            for page in pages[-3:]:
-                url = page.get('url', 'Unknown')
-                title = page.get('title', 'No title')[:50]
-                content_len = len(page.get('content', ''))
-                print(f"  • {title} ({content_len:,} chars)")
+            for url, title, content_len in recent_pages:
+                print(f"  • {title[:50]} ({content_len:,} chars)")
                 print(f"    {url}")
         
         print("=" * 50)
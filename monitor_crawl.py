@@ -4,38 +4,63 @@ Monitor the progress of the USM parallel crawler
 """
 
 import os
-import json
-import glob
+import subprocess
 from datetime import datetime
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
 def check_crawl_progress():
     """Check the progress of the crawling process"""
     print("🔍 Monitoring USM Parallel Crawler Progress")
     print("=" * 50)
     
-    # Check for Python processes
-    import subprocess
-    try:
-        result = subprocess.run(['powershell', '-Command', 'Get-Process python -ErrorAction SilentlyContinue'], 
-                              capture_output=True, text=True)
-        if 'python' in result.stdout:
-            print("✅ Python processes are running")
-        else:
-            print("❌ No Python processes found")
-    except:
+    # Check for Python processes other than this monitor; without psutil, ask PowerShell
+    if psutil is not None:
+        running = any(proc.pid != os.getpid() and proc.info['name'] and 'python' in proc.info['name'].lower()
+                      for proc in psutil.process_iter(['name']))
+    else:
+        try:
+            result = subprocess.run(['powershell', '-Command', 'Get-Process python -ErrorAction SilentlyContinue'],
+                                    capture_output=True, text=True)
+            running = 'python' in result.stdout
+        except OSError:
+            running = None
+    if running is None:
         print("⚠️  Could not check Python processes")
+    elif running:
+        print("✅ Python processes are running")
+    else:
+        print("❌ No Python processes found")
     
-    # Check for output files
-    json_files = glob.glob("usm_parallel_crawl_*.json")
-    md_files = glob.glob("usm_parallel_rag_*.md")
+    # Check for output files in a single directory scan
+    json_files = []
+    md_files = []
+    log_files = []
+    with os.scandir('.') as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith('usm_parallel_crawl_') and name.endswith('.json'):
+                json_files.append(entry)
+            elif name.startswith('usm_parallel_rag_') and name.endswith('.md'):
+                md_files.append(entry)
+            elif name.endswith('.log'):
+                log_files.append(name)
     
     if json_files:
-        latest_json = max(json_files, key=os.path.getctime)
+        latest_json = max(json_files, key=lambda entry: entry.stat().st_ctime).name
         print(f"📄 Latest JSON file: {latest_json}")
         
         try:
-            with open(latest_json, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(latest_json, 'rb') as f:
+                data = json_loads(f.read())
                 stats = data.get('crawl_stats', {})
                 print(f"📊 Pages crawled: {stats.get('total_pages', 0):,}")
                 print(f"✅ Successful: {stats.get('successful_pages', 0):,}")
@@ -46,11 +71,10 @@ def check_crawl_progress():
         print("⏳ No output files created yet - crawler may still be starting")
     
     if md_files:
-        latest_md = max(md_files, key=os.path.getctime)
+        latest_md = max(md_files, key=lambda entry: entry.stat().st_ctime).name
         print(f"📝 Latest Markdown file: {latest_md}")
     
     # Check for any error logs
-    log_files = glob.glob("*.log")
     if log_files:
         print(f"📋 Log files found: {log_files}")
     
@@ -4,34 +4,60 @@ RAG-Optimized USM Website Crawler
 Specifically designed for maximum content extraction for RAG systems
 """
 
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import httpx
+from lxml import etree, html as lxml_html
 import json
-import time
+import os
 import re
+import time
 from urllib.parse import urljoin, urlparse
 from datetime import datetime
 from trafilatura import extract
-import concurrent.futures
-from collections import deque
+from collections import defaultdict, deque, namedtuple
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from xxhash import xxh3_64_intdigest
+except ImportError:
+    xxh3_64_intdigest = None
+
+
+def url_key(url):
+    """Return a 64-bit key for visited-URL dedup"""
+    if xxh3_64_intdigest is None:
+        return hash(url)
+    return xxh3_64_intdigest(url.encode('utf-8'))
+
+
+ContentStats = namedtuple('ContentStats', ['paragraph_count', 'long_sentence_count', 'keyword_count'])
 
 
 class RAGOptimizedCrawler:
-    def __init__(self, max_pages=10000, max_workers=50, delay=0.1):
+    def __init__(self, max_pages=10000, max_workers=50, delay=0.1, ndjson=True):
         self.max_pages = max_pages
         self.max_workers = max_workers
         self.delay = delay
-        self.visited_urls = set()
+        self.ndjson = ndjson  # Stream one page per line instead of one indented JSON document
+        self.cache_file = 'etag_cache.json'
+        self.etag_cache = self.load_etag_cache()  # url -> validators and page record from the last run
+        self.not_modified = 0
+        self._next_ok = defaultdict(float)  # host -> monotonic time of its next allowed request
+        self.visited_urls = set()  # 64-bit URL hashes, not the URL strings
         self.results = []
         self.url_queue = deque()
-        self.session = requests.Session()
-        self.session.headers.update({
+        self._queued = set()  # URL hashes ever queued, so each URL is queued at most once
+        self.headers = {
             'User-Agent': 'RAG Research Bot (+https://www.usm.edu)',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
             'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        })
+        }
         
         # RAG-optimized starting URLs - focus on content-rich pages
         self.start_urls = [
@@ -74,106 +100,217 @@ class RAGOptimizedCrawler:
             'research', 'faculty', 'department', 'academic', 'student',
             'campus', 'housing', 'dining', 'library', 'technology'
         ]
+        
+        # Link filters compiled once so get_links does a single regex scan per URL
+        self._blocked_ext = re.compile(
+            r'\.(pdf|docx?|xlsx?|pptx?|zip|rar|tar|gz|mp[34]|avi|mov|wmv|wav|jpe?g|png|gif|bmp|tiff|svg)($|\?)',
+            re.IGNORECASE
+        )
+        self._blocked_host = re.compile(r'(facebook|twitter|instagram|linkedin|youtube|vimeo)\.com')
+        
+        # Content analysis patterns shared by is_content_rich and calculate_rag_score
+        self._keyword_re = re.compile('|'.join(map(re.escape, self.content_keywords)), re.IGNORECASE)
+        self._long_sentence_re = re.compile(r'[^.\s][^.]{49,}[^.\s]')
+        
+        # Fallback extraction reads the shared tree without mutating it, skipping boilerplate subtrees
+        boilerplate = 'self::script or self::style or self::nav or self::footer or self::header or self::aside'
+        outside_boilerplate = f'not(ancestor-or-self::*[{boilerplate}])'
+        self._main_content_xpaths = [
+            etree.XPath(f'.//main[{outside_boilerplate}]'),
+            etree.XPath(f'.//article[{outside_boilerplate}]'),
+            etree.XPath(f".//div[contains(concat(' ', normalize-space(@class), ' '), ' content ')][{outside_boilerplate}]"),
+        ]
+        self._visible_text_xpath = etree.XPath(f'.//text()[not(ancestor::*[{boilerplate}])]')
     
-    def is_content_rich(self, content, title):
+    def _keyword_count(self, text):
+        """Count distinct content keywords in text with one scan of the compiled pattern"""
+        return len(set(map(str.lower, self._keyword_re.findall(text))))
+    
+    def _analyze(self, content):
+        """Collect paragraph, sentence and keyword counts in one pass over the content"""
+        return ContentStats(
+            paragraph_count=content.count('\n\n') + 1,
+            long_sentence_count=sum(1 for _ in self._long_sentence_re.finditer(content)),
+            keyword_count=self._keyword_count(content)
+        )
+    
+    def is_content_rich(self, content, stats):
         """Check if content is rich enough for RAG"""
         if len(content) < self.min_content_length:
             return False
         
-        # Check for content keywords
-        content_lower = content.lower()
-        keyword_count = sum(1 for keyword in self.content_keywords if keyword in content_lower)
-        
         # Check for paragraph structure
-        paragraphs = content.split('\n\n')
-        if len(paragraphs) < self.min_paragraphs:
+        if stats.paragraph_count < self.min_paragraphs:
             return False
         
-        # Check for substantial sentences
-        sentences = content.split('.')
-        long_sentences = [s for s in sentences if len(s.strip()) > 50]
-        
-        return keyword_count >= 2 and len(long_sentences) >= 3
+        # Check for content keywords and substantial sentences
+        return stats.keyword_count >= 2 and stats.long_sentence_count >= 3
     
-    def extract_content(self, url, html):
-        """Extract content using trafilatura with RAG optimization"""
+    def extract_content(self, url, tree):
+        """Extract content from the parsed page using trafilatura with RAG optimization"""
         try:
-            # Use trafilatura for clean extraction
-            clean_text = extract(html)
+            # Use trafilatura for clean extraction; it works on a copy of the tree
+            clean_text = extract(tree)
             if clean_text and len(clean_text) > 200:
                 return clean_text.strip()
         except:
             pass
         
-        # Fallback to BeautifulSoup
-        soup = BeautifulSoup(html, 'html.parser')
+        # Fallback to the main content area, then the whole page
+        main_content = tree
+        for xpath in self._main_content_xpaths:
+            matches = xpath(tree)
+            if matches:
+                main_content = matches[0]
+                break
         
-        # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
-            element.decompose()
-        
-        # Extract main content
-        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
-        if main_content:
-            return main_content.get_text(separator='\n', strip=True)
-        
-        # Fallback to body
-        return soup.get_text(separator='\n', strip=True)
+        return '\n'.join(text.strip() for text in self._visible_text_xpath(main_content) if text.strip())
     
-    def get_links(self, url, html):
-        """Extract relevant links for further crawling"""
-        soup = BeautifulSoup(html, 'html.parser')
+    def get_links(self, url, tree):
+        """Extract relevant links for further crawling from a parsed lxml tree"""
         links = []
         
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            text = link.get_text(strip=True)
+        for link in tree.iter('a'):
+            href = link.get('href')
+            if not href:
+                continue
+            text = ' '.join(link.text_content().split())
             
             # Convert relative URLs to absolute
             absolute_url = urljoin(url, href)
             
             # Filter for USM domain and content-rich pages
             if ('usm.edu' in absolute_url and 
-                not any(ext in absolute_url.lower() for ext in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar', '.tar', '.gz', '.mp4', '.avi', '.mov', '.wmv', '.mp3', '.wav', '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg']) and
-                not any(social in absolute_url for social in ['facebook.com', 'twitter.com', 'instagram.com', 'linkedin.com', 'youtube.com', 'vimeo.com']) and
+                not self._blocked_ext.search(absolute_url) and
+                not self._blocked_host.search(absolute_url) and
                 len(text) > 3 and
-                absolute_url not in self.visited_urls):
+                url_key(absolute_url) not in self.visited_urls):
                 
                 links.append((absolute_url, text))
         
         return links
     
-    def crawl_page(self, url):
+    def load_etag_cache(self):
+        """Load ETag/Last-Modified validators saved by a previous run"""
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable {self.cache_file}: {e}")
+            return {}
+    
+    def save_etag_cache(self):
+        """Persist validators so the next run can send conditional requests"""
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(self.etag_cache, f, ensure_ascii=False)
+    
+    def _cached_page(self, url):
+        """Result for a 304 response: the page record saved when the page last changed"""
+        self.not_modified += 1
+        return self.etag_cache[url]['page']
+    
+    async def throttle(self, url):
+        """Space out requests to the same host by self.delay without blocking other hosts"""
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        # Reserve the next slot before awaiting so concurrent tasks queue up behind it
+        slot = max(now, self._next_ok[host])
+        self._next_ok[host] = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+    
+    async def crawl_page(self, client, url):
         """Crawl a single page with RAG optimization"""
         try:
-            response = self.session.get(url, timeout=30)
+            # Ask the server to skip the body if the page is unchanged since the last run
+            request_headers = {}
+            cached = self.etag_cache.get(url)
+            # Entries without a saved page record can't stand in for the body, so fetch it in full
+            if cached and 'page' in cached:
+                if cached.get('etag'):
+                    request_headers['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    request_headers['If-Modified-Since'] = cached['last_modified']
+            
+            response = await client.get(url, headers=request_headers)
+            if response.status_code == 304 and request_headers:
+                return self._cached_page(url)
             response.raise_for_status()
+            # Use raw bytes to skip httpx's charset detection in response.text
+            body = response.content
+            status_code = response.status_code
+            charset = response.charset_encoding
+            etag = response.headers.get('ETag', '')
+            last_modified = response.headers.get('Last-Modified', '')
+            
+            # Decoding and parsing are CPU-bound, so run them off the event loop
+            page_data = await asyncio.to_thread(self.process_page, url, body, status_code, charset)
+            
+            if etag or last_modified:
+                self.etag_cache[url] = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'page': page_data
+                }
+            
+            return page_data
+            
+        except Exception as e:
+            print(f"Error crawling {url}: {e}")
+            return None
+    
+    def parse_html(self, body, charset):
+        """Parse the page with lxml, decoding with the declared charset or UTF-8 when possible"""
+        for encoding in (charset, 'utf-8'):
+            if not encoding:
+                continue
+            try:
+                html = body.decode(encoding)
+            except (LookupError, UnicodeDecodeError):
+                continue
+            if html.lstrip().startswith('<?xml'):
+                # lxml refuses str input that carries an XML encoding declaration
+                return lxml_html.fromstring(html.encode('utf-8'), parser=lxml_html.HTMLParser(encoding='utf-8'))
+            return lxml_html.fromstring(html)
+        
+        # Unknown encoding: let lxml sniff <meta charset> from the raw bytes
+        return lxml_html.fromstring(body)
+    
+    def process_page(self, url, body, status_code, charset=None):
+        """Extract content and metadata from a fetched page"""
+        try:
+            # Parse once with lxml's C parser and share the tree for
+            # content, title, headings and links
+            tree = self.parse_html(body, charset)
             
             # Extract content
-            content = self.extract_content(url, response.text)
+            content = self.extract_content(url, tree)
             
-            if not content or len(content) < 200:
+            # Cheapest filters first: length, then the content analysis; title,
+            # headings and links are only gathered for pages that pass
+            if not content or len(content) < max(200, self.min_content_length):
                 return None
             
             # Check if content is rich enough for RAG
-            title = BeautifulSoup(response.text, 'html.parser').find('title')
-            title_text = title.get_text(strip=True) if title else 'No title'
-            
-            if not self.is_content_rich(content, title_text):
+            stats = self._analyze(content)
+            if not self.is_content_rich(content, stats):
                 return None
             
             # Extract metadata
-            soup = BeautifulSoup(response.text, 'html.parser')
+            title = tree.findtext('.//title')
+            title_text = title.strip() if title and title.strip() else 'No title'
+            
             headings = []
-            for i in range(1, 7):
-                for heading in soup.find_all(f'h{i}'):
-                    headings.append({
-                        'level': i,
-                        'text': heading.get_text(strip=True)
-                    })
+            for heading in tree.iter('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+                headings.append({
+                    'level': int(heading.tag[1]),
+                    'text': ' '.join(heading.text_content().split())
+                })
             
             # Extract links for further crawling
-            links = self.get_links(url, response.text)
+            links = self.get_links(url, tree)
             
             page_data = {
                 'url': url,
@@ -182,37 +319,33 @@ class RAGOptimizedCrawler:
                 'content_length': len(content),
                 'headings': headings,
                 'links': links[:20],  # Limit links to avoid huge files
-                'timestamp': datetime.now().isoformat(),
-                'status_code': response.status_code,
-                'rag_score': self.calculate_rag_score(content, title_text)
+                'timestamp': time.time(),  # Formatted once in save_results
+                'status_code': status_code,
+                'rag_score': self.calculate_rag_score(content, title_text, stats)
             }
             
             return page_data
             
         except Exception as e:
-            print(f"Error crawling {url}: {e}")
+            print(f"Error processing {url}: {e}")
             return None
     
-    def calculate_rag_score(self, content, title):
+    def calculate_rag_score(self, content, title, stats):
         """Calculate RAG relevance score"""
         score = 0
-        content_lower = content.lower()
-        title_lower = title.lower()
         
         # Content length score
         score += min(len(content) / 1000, 10)  # Max 10 points for length
         
         # Keyword score
-        keyword_count = sum(1 for keyword in self.content_keywords if keyword in content_lower)
-        score += keyword_count * 2  # 2 points per keyword
+        score += stats.keyword_count * 2  # 2 points per keyword
         
         # Title relevance
-        title_keywords = sum(1 for keyword in self.content_keywords if keyword in title_lower)
+        title_keywords = self._keyword_count(title)
         score += title_keywords * 3  # 3 points per title keyword
         
         # Structure score
-        paragraphs = content.split('\n\n')
-        score += min(len(paragraphs) / 5, 5)  # Max 5 points for structure
+        score += min(stats.paragraph_count / 5, 5)  # Max 5 points for structure
         
         return round(score, 2)
     
@@ -227,96 +360,129 @@ class RAGOptimizedCrawler:
         
         # Initialize queue with start URLs
         for url in self.start_urls:
-            self.url_queue.append(url)
+            self.enqueue(url)
         
-        start_time = datetime.now()
+        self._start_mono = time.monotonic()
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            while self.url_queue and len(self.visited_urls) < self.max_pages:
-                # Get batch of URLs to process
-                batch_size = min(50, len(self.url_queue))
-                batch_urls = [self.url_queue.popleft() for _ in range(batch_size)]
-                
-                # Filter out already visited URLs
-                new_urls = [url for url in batch_urls if url not in self.visited_urls]
-                
-                if not new_urls:
-                    continue
-                
-                # Process batch concurrently
-                future_to_url = {
-                    executor.submit(self.crawl_page, url): url 
-                    for url in new_urls
-                }
-                
-                for future in concurrent.futures.as_completed(future_to_url):
-                    url = future_to_url[future]
-                    self.visited_urls.add(url)
-                    
-                    try:
-                        result = future.result()
-                        if result:
-                            self.results.append(result)
-                            
-                            # Add new links to queue
-                            for link_url, link_text in result.get('links', []):
-                                if link_url not in self.visited_urls:
-                                    self.url_queue.append(link_url)
-                            
-                            # Progress update
-                            if len(self.results) % 10 == 0:
-                                elapsed = (datetime.now() - start_time).total_seconds()
-                                print(f"📄 Crawled: {len(self.results):,} pages | "
-                                      f"Queue: {len(self.url_queue):,} | "
-                                      f"Time: {elapsed:.1f}s")
-                        
-                    except Exception as e:
-                        print(f"Error processing {url}: {e}")
-                    
-                    # Respect delay
-                    time.sleep(self.delay)
+        asyncio.run(self._crawl())
         
         # Save results
-        self.save_results()
+        stats = self.save_results()
+        self.save_etag_cache()
         
-        # Print summary
-        elapsed = (datetime.now() - start_time).total_seconds()
-        total_content = sum(len(page['content']) for page in self.results)
-        avg_content = total_content / len(self.results) if self.results else 0
+        # Print summary from the stats save_results already computed
+        elapsed = time.monotonic() - self._start_mono
         
         print("\n" + "=" * 60)
         print("✅ RAG-Optimized Crawling Completed!")
-        print(f"📄 Pages crawled: {len(self.results):,}")
-        print(f"📝 Total content: {total_content:,} characters")
-        print(f"📊 Average content: {avg_content:.0f} characters")
+        print(f"📄 Pages crawled: {stats['pages_crawled']:,}")
+        print(f"📝 Total content: {stats['total_content']:,} characters")
+        print(f"📊 Average content: {stats['average_content']:.0f} characters")
+        print(f"♻️  Unchanged (304): {self.not_modified:,}")
         print(f"⏱️  Time elapsed: {elapsed:.1f} seconds")
-        print(f"🎯 RAG Score: {sum(page['rag_score'] for page in self.results):.1f}")
+        print(f"🎯 RAG Score: {stats['avg_rag_score'] * stats['pages_crawled']:.1f}")
         print("=" * 60)
     
+    def enqueue(self, url):
+        """Queue a URL unless it has already been queued"""
+        key = url_key(url)
+        if key in self._queued:
+            return
+        self._queued.add(key)
+        self.url_queue.append(url)
+    
+    async def _crawl(self):
+        """Fetch queued URLs in batches over a shared HTTP/2 client"""
+        semaphore = asyncio.Semaphore(self.max_workers)
+        limits = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+        
+        async def bounded_crawl(client, url):
+            # Wait for the host's slot before taking a worker, so waiting doesn't hold one
+            await self.throttle(url)
+            async with semaphore:
+                return await self.crawl_page(client, url)
+        
+        # HTTP/2 multiplexes concurrent requests to the same host over a few connections
+        async with httpx.AsyncClient(http2=True, headers=self.headers, timeout=30.0,
+                                     limits=limits, follow_redirects=True) as client:
+            while self.url_queue and len(self.visited_urls) < self.max_pages:
+                # Get batch of URLs to process; enqueue() admits each URL once,
+                # so none of them has been visited yet
+                batch_size = min(50, len(self.url_queue))
+                new_urls = [self.url_queue.popleft() for _ in range(batch_size)]
+                
+                # Process batch concurrently
+                results = await asyncio.gather(*(bounded_crawl(client, url) for url in new_urls))
+                
+                for url, result in zip(new_urls, results):
+                    self.visited_urls.add(url_key(url))
+                    
+                    if result:
+                        # Add new links to queue
+                        for link_url, link_text in result.get('links', []):
+                            self.enqueue(link_url)
+                        
+                        self.results.append(result)
+                        
+                        # Progress update
+                        if len(self.results) % 10 == 0:
+                            elapsed = time.monotonic() - self._start_mono
+                            print(f"📄 Crawled: {len(self.results):,} pages | "
+                                  f"Queue: {len(self.url_queue):,} | "
+                                  f"Time: {elapsed:.1f}s")
+    
     def save_results(self):
-        """Save results to JSON file"""
+        """Save results to NDJSON (or a single JSON document when ndjson is off)"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"rag_optimized_crawl_{timestamp}.json"
         
-        # Sort by RAG score
-        sorted_results = sorted(self.results, key=lambda x: x['rag_score'], reverse=True)
+        # Scan the results once and reuse the totals
+        page_count = len(self.results)
+        scores = [page['rag_score'] for page in self.results]
+        total_content = sum(page['content_length'] for page in self.results)
+        total_score = sum(scores)
         
-        data = {
-            'crawl_stats': {
-                'pages_crawled': len(self.results),
-                'total_content': sum(len(page['content']) for page in self.results),
-                'average_content': sum(len(page['content']) for page in self.results) / len(self.results) if self.results else 0,
-                'max_rag_score': max(page['rag_score'] for page in self.results) if self.results else 0,
-                'avg_rag_score': sum(page['rag_score'] for page in self.results) / len(self.results) if self.results else 0,
-                'timestamp': datetime.now().isoformat()
-            },
-            'pages': sorted_results
+        stats = {
+            'pages_crawled': page_count,
+            'total_content': total_content,
+            'average_content': total_content / page_count if page_count else 0,
+            'max_rag_score': max(scores, default=0),
+            'avg_rag_score': total_score / page_count if page_count else 0,
+            'timestamp': datetime.now().isoformat()
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # Sort by RAG score and format the raw page timestamps lazily
+        sorted_results = (
+            dict(page, timestamp=datetime.fromtimestamp(page['timestamp']).isoformat())
+            for page in sorted(self.results, key=itemgetter('rag_score'), reverse=True)
+        )
+        
+        if self.ndjson:
+            # First line holds crawl_stats, then one page per line, so neither
+            # the writer nor a reader has to hold the whole crawl at once
+            filename = f"rag_optimized_crawl_{timestamp}.ndjson"
+            dumps = orjson.dumps if orjson is not None else (lambda obj: json.dumps(obj, ensure_ascii=False).encode('utf-8'))
+            with open(filename, 'wb') as f:
+                f.write(dumps({'crawl_stats': stats}) + b'\n')
+                for page in sorted_results:
+                    f.write(dumps(page) + b'\n')
+        else:
+            filename = f"rag_optimized_crawl_{timestamp}.json"
+            data = {
+                'crawl_stats': stats,
+                'pages': list(sorted_results)
+            }
+            
+            if orjson is not None:
+                # orjson emits UTF-8 bytes directly, so skip the text-mode encode
+                with open(filename, 'wb') as f:
+                    f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            else:
+                with open(filename, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
         
         print(f"💾 Results saved to: {filename}")
+        
+        return stats
 
 
 if __name__ == '__main__':
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Shared loader for crawl results files, used by the check scripts
+"""
+
+import os
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+def load_results(path):
+    """Return (crawl_stats, pages iterator) without materializing the pages list"""
+    if path.endswith('.jsonl'):
+        return _jsonl_stats(path), _stream_jsonl_pages(path)
+    
+    if ijson is None:
+        with open(path, 'rb') as f:
+            data = json_loads(f.read())
+        return data.get('crawl_stats', {}), iter(data.get('pages', []))
+    
+    with open(path, 'rb') as f:
+        stats = next(ijson.items(f, 'crawl_stats'), {})
+    return stats, _stream_pages(path)
+
+def _stream_pages(path):
+    """Yield pages one at a time from a results file"""
+    with open(path, 'rb') as f:
+        yield from ijson.items(f, 'pages.item')
+
+def _jsonl_stats(path):
+    """Read crawl_stats from the last line of a JSON Lines results file"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 65536))
+        last_line = f.read().rstrip(b'\n').rsplit(b'\n', 1)[-1]
+    try:
+        return json_loads(last_line).get('crawl_stats', {})
+    except ValueError:
+        return {}
+
+def _stream_jsonl_pages(path):
+    """Yield pages one line at a time, skipping the trailing crawl_stats record"""
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json_loads(line)
+            except ValueError:
+                # A crawl still in progress leaves a partly written last line
+                break
+            if 'crawl_stats' not in record:
+                yield record
@@ -5,29 +5,42 @@ Just extracts clean text content - no JSON overhead, no links, no metadata
 Perfect for RAG systems
 """
 
-import requests
-from bs4 import BeautifulSoup
-import time
+import asyncio
+import httpx
+from lxml import etree, html as lxml_html
 import re
-from urllib.parse import urljoin, urlparse
+import time
+from urllib.parse import urljoin, urlsplit, urlunsplit
 from datetime import datetime
 from trafilatura import extract
-import concurrent.futures
 from collections import deque
 
+try:
+    from xxhash import xxh3_64_intdigest
+except ImportError:
+    xxh3_64_intdigest = None
+
 
 class SimpleRAGCrawler:
     def __init__(self, max_pages=2000, max_workers=20, delay=0.2):
         self.max_pages = max_pages
         self.max_workers = max_workers
-        self.delay = delay
-        self.visited_urls = set()
-        self.content_pages = []  # Just store clean text content
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.delay = delay  # Minimum gap between requests to the same host
+        self._next_ok = {}  # host -> monotonic time of its next allowed request
+        self.visited_urls = set()  # Fingerprints of canonical URLs, see _canon_fp
+        self._queued = set()       # Fingerprints of every URL ever queued
+        self.content_pages = 0     # Pages written to the output file so far
+        self.total_content = 0     # Characters written to the output file so far
+        self._out = None           # Output file, open only while crawling
+        self._content_fps = set()  # Fingerprints of page texts already written
+        self.headers = {
             'User-Agent': 'RAG Research Bot (+https://www.usm.edu)',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        })
+        }
+        
+        # Only HTML bodies are downloaded, and at most max_body_bytes of each
+        self._html_types = ('text/html', 'application/xhtml+xml')
+        self.max_body_bytes = 2 * 1024 * 1024
         
         # Start with content-rich pages
         self.start_urls = [
@@ -43,6 +56,28 @@ class SimpleRAGCrawler:
             'https://www.usm.edu/housing/',
         ]
         
+        # Elements whose text never counts as page content; the fallback
+        # reads around them so the shared tree is never modified
+        boilerplate = ' or '.join(f'self::{tag}' for tag in ('script', 'style', 'nav', 'footer', 'header', 'aside', 'menu', 'sidebar'))
+        outside_boilerplate = f'not(ancestor-or-self::*[{boilerplate}])'
+        self._main_content_xpaths = [
+            etree.XPath(f'.//main[{outside_boilerplate}]'),
+            etree.XPath(f'.//article[{outside_boilerplate}]'),
+            etree.XPath(f".//div[contains(concat(' ', normalize-space(@class), ' '), ' content ')][{outside_boilerplate}]"),
+        ]
+        self._visible_text_xpath = etree.XPath(f'.//text()[not(ancestor::*[{boilerplate}])]')
+        
+        # Link filters, built once instead of per anchor
+        self._bad_exts = ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar', '.tar', '.gz',
+                          '.mp4', '.avi', '.mov', '.wmv', '.mp3', '.wav', '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg')
+        self._socials = ('facebook.com', 'twitter.com', 'instagram.com', 'linkedin.com', 'youtube.com', 'vimeo.com')
+        # Only anchors that can resolve to usm.edu: ones naming the domain, or hrefs with no
+        # scheme (no ':' before the first '/', '?' or '#'), so offsite links never reach Python
+        self._candidate_links_xpath = etree.XPath(
+            ".//a[@href][contains(@href, 'usm.edu') or "
+            "not(contains(substring-before(concat(translate(@href, '?#', '//'), '/'), '/'), ':'))]")
+        self._text_kw = ('program', 'course', 'degree', 'admission', 'academic', 'student', 'faculty', 'research', 'news', 'event')
+        
         # Content quality filters
         self.min_content_length = 800  # Minimum 800 characters
         self.content_keywords = [
@@ -51,100 +86,195 @@ class SimpleRAGCrawler:
             'research', 'faculty', 'department', 'academic', 'student',
             'campus', 'housing', 'dining', 'library', 'technology'
         ]
+        
+        # One case-insensitive alternation instead of a substring scan per keyword
+        self._kw_re = re.compile('|'.join(map(re.escape, self.content_keywords)), re.IGNORECASE)
+        self._text_kw_re = re.compile('|'.join(map(re.escape, self._text_kw)), re.IGNORECASE)
+        # A '.'-delimited run whose stripped length exceeds 30 characters
+        self._long_sentence_re = re.compile(r'[^.\s][^.]{29,}[^.\s]')
     
     def is_meaningful_content(self, content, title):
         """Check if content is meaningful for RAG"""
         if len(content) < self.min_content_length:
             return False
         
-        # Check for content keywords
-        content_lower = content.lower()
-        keyword_count = sum(1 for keyword in self.content_keywords if keyword in content_lower)
+        # Must have keywords (distinct keywords, not occurrences); stop at the third
+        keywords_seen = set()
+        for match in self._kw_re.finditer(content):
+            keywords_seen.add(match.group().lower())
+            if len(keywords_seen) >= 3:
+                break
+        else:
+            return False
         
-        # Check for substantial sentences
-        sentences = content.split('.')
-        long_sentences = [s for s in sentences if len(s.strip()) > 30]
+        # ...and substantial sentences; stop scanning at the fifth one
+        long_sentences = 0
+        for _ in self._long_sentence_re.finditer(content):
+            long_sentences += 1
+            if long_sentences >= 5:
+                return True
+        return False
+    
+    def _fingerprint(self, text):
+        """64-bit fingerprint of a string, xxh3 when available"""
+        if xxh3_64_intdigest is None:
+            return hash(text)
+        return xxh3_64_intdigest(text.encode('utf-8', 'ignore'))
+    
+    def _canon_fp(self, url):
+        """64-bit fingerprint of the URL with host case, fragment, query order and trailing slash normalized"""
+        parts = urlsplit(url)
+        query = '&'.join(sorted(parts.query.split('&'))) if parts.query else ''
+        return self._fingerprint(urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), query, '')))
+    
+    def enqueue(self, url_queue, url):
+        """Queue a URL unless an equivalent URL has already been queued"""
+        fp = self._canon_fp(url)
+        if fp in self._queued:
+            return
+        self._queued.add(fp)
+        url_queue.append((url, fp))
+    
+    def parse_html(self, body, charset):
+        """Parse the page with lxml, decoding with the declared charset or UTF-8 when possible"""
+        for encoding in (charset, 'utf-8'):
+            if not encoding:
+                continue
+            try:
+                html = body.decode(encoding)
+            except (LookupError, UnicodeDecodeError):
+                continue
+            if html.lstrip().startswith('<?xml'):
+                # lxml refuses str input that carries an XML encoding declaration
+                return lxml_html.fromstring(html.encode('utf-8'), parser=lxml_html.HTMLParser(encoding='utf-8'))
+            return lxml_html.fromstring(html)
         
-        # Must have keywords and substantial sentences
-        return keyword_count >= 3 and len(long_sentences) >= 5
+        # Unknown encoding: let lxml sniff <meta charset> from the raw bytes
+        return lxml_html.fromstring(body)
     
-    def extract_clean_content(self, url, html):
+    def extract_clean_content(self, url, tree):
         """Extract just clean text content"""
         try:
-            # Use trafilatura for clean extraction
-            clean_text = extract(html)
+            # Use trafilatura for clean extraction; it works on a copy of the tree
+            clean_text = extract(tree)
             if clean_text and len(clean_text) > 200:
                 return clean_text.strip()
         except:
             pass
         
-        # Fallback to BeautifulSoup
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Remove all unwanted elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside', 'menu', 'sidebar']):
-            element.decompose()
-        
-        # Extract main content
-        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
-        if main_content:
-            return main_content.get_text(separator='\n', strip=True)
+        # Fallback to the main content area, then the whole page
+        main_content = tree
+        for xpath in self._main_content_xpaths:
+            matches = xpath(tree)
+            if matches:
+                main_content = matches[0]
+                break
         
-        # Fallback to body
-        return soup.get_text(separator='\n', strip=True)
+        return '\n'.join(text.strip() for text in self._visible_text_xpath(main_content) if text.strip())
     
-    def get_content_links(self, url, html):
+    def get_content_links(self, url, tree):
         """Get only content-rich links"""
-        soup = BeautifulSoup(html, 'html.parser')
         links = []
         
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            text = link.get_text(strip=True)
+        for link in self._candidate_links_xpath(tree):
+            href = link.get('href')
+            # Most anchors hold a single text node; only walk the subtree when they don't
+            if len(link):
+                text = ''.join(piece.strip() for piece in link.itertext())
+            else:
+                text = (link.text or '').strip()
             
-            # Convert relative URLs to absolute
-            absolute_url = urljoin(url, href)
+            # Cheapest checks first: anchor text decides most links without touching the URL
+            if len(text) <= 5:
+                continue
+            # Only follow links that look like content pages
+            if not self._text_kw_re.search(text):
+                continue
+            
+            # Convert relative URLs to absolute; absolute hrefs need no join
+            absolute_url = href if href.startswith(('http://', 'https://')) else urljoin(url, href)
             
             # Filter for USM domain and content-rich pages
-            if ('usm.edu' in absolute_url and 
-                not any(ext in absolute_url.lower() for ext in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar', '.tar', '.gz', '.mp4', '.avi', '.mov', '.wmv', '.mp3', '.wav', '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg']) and
-                not any(social in absolute_url for social in ['facebook.com', 'twitter.com', 'instagram.com', 'linkedin.com', 'youtube.com', 'vimeo.com']) and
-                len(text) > 5 and
-                absolute_url not in self.visited_urls and
-                # Only follow links that look like content pages
-                any(keyword in text.lower() for keyword in ['program', 'course', 'degree', 'admission', 'academic', 'student', 'faculty', 'research', 'news', 'event'])):
+            if ('usm.edu' in absolute_url and
+                not urlsplit(absolute_url).path.lower().endswith(self._bad_exts) and
+                not any(social in absolute_url for social in self._socials)):
                 
                 links.append(absolute_url)
         
         return links
     
-    def crawl_page(self, url):
+    async def throttle(self, url):
+        """Space out requests to the same host by self.delay without blocking other hosts"""
+        host = urlsplit(url).netloc
+        now = time.monotonic()
+        # Reserve the next slot before awaiting so concurrent tasks queue up behind it
+        slot = max(now, self._next_ok.get(host, 0.0))
+        self._next_ok[host] = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+    
+    async def fetch_html(self, client, url):
+        """Stream a GET and return (body, charset), or None when the response isn't HTML"""
+        async with client.stream('GET', url) as response:
+            response.raise_for_status()
+            
+            # Decide from the headers alone, so PDFs and media are never downloaded
+            content_type = response.headers.get('content-type', '').lower()
+            if content_type and not content_type.startswith(self._html_types):
+                return None
+            
+            # Stop reading once the page passes the size cap
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes(65536):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_body_bytes:
+                    break
+            return b''.join(chunks), response.charset_encoding
+    
+    async def crawl_page(self, client, url):
         """Crawl a single page and extract just content"""
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            fetched = await self.fetch_html(client, url)
+            if fetched is None:
+                return None, []
+            body, charset = fetched
+            
+            # Parsing is CPU-bound, so run it off the event loop
+            return await asyncio.to_thread(self.process_page, url, body, charset)
+            
+        except Exception as e:
+            print(f"Error crawling {url}: {e}")
+            return None, []
+    
+    def process_page(self, url, body, charset):
+        """Extract clean content and content links from a fetched page"""
+        try:
+            # Parse once with lxml and share the tree for content, title and links
+            tree = self.parse_html(body, charset)
             
             # Extract clean content
-            content = self.extract_clean_content(url, response.text)
+            content = self.extract_clean_content(url, tree)
             
             if not content or len(content) < 200:
                 return None, []
             
             # Check if content is meaningful
-            title = BeautifulSoup(response.text, 'html.parser').find('title')
-            title_text = title.get_text(strip=True) if title else 'No title'
+            title = tree.find('.//title')
+            title_text = ''.join(piece.strip() for piece in title.itertext()) if title is not None else 'No title'
             
             if not self.is_meaningful_content(content, title_text):
                 return None, []
             
             # Get content links for further crawling
-            links = self.get_content_links(url, response.text)
+            links = self.get_content_links(url, tree)
             
             # Return just the content and links
             return content, links
             
         except Exception as e:
-            print(f"Error crawling {url}: {e}")
+            print(f"Error processing {url}: {e}")
             return None, []
     
     def crawl_website(self):
@@ -157,83 +287,92 @@ class SimpleRAGCrawler:
         print("=" * 60)
         
         # Initialize queue with start URLs
-        url_queue = deque(self.start_urls)
+        url_queue = deque()
+        for url in self.start_urls:
+            self.enqueue(url_queue, url)
         
         start_time = datetime.now()
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            while url_queue and len(self.visited_urls) < self.max_pages:
-                # Get batch of URLs to process
-                batch_size = min(20, len(url_queue))
-                batch_urls = [url_queue.popleft() for _ in range(batch_size)]
-                
-                # Filter out already visited URLs
-                new_urls = [url for url in batch_urls if url not in self.visited_urls]
-                
-                if not new_urls:
-                    continue
-                
-                # Process batch concurrently
-                future_to_url = {
-                    executor.submit(self.crawl_page, url): url 
-                    for url in new_urls
-                }
-                
-                for future in concurrent.futures.as_completed(future_to_url):
-                    url = future_to_url[future]
-                    self.visited_urls.add(url)
-                    
-                    try:
-                        content, links = future.result()
-                        if content:
-                            self.content_pages.append(content)
-                            
-                            # Add new links to queue
-                            for link_url in links:
-                                if link_url not in self.visited_urls:
-                                    url_queue.append(link_url)
-                            
-                            # Progress update
-                            if len(self.content_pages) % 20 == 0:
-                                elapsed = (datetime.now() - start_time).total_seconds()
-                                print(f"📄 Content pages: {len(self.content_pages):,} | "
-                                      f"Queue: {len(url_queue):,} | "
-                                      f"Time: {elapsed:.1f}s")
-                        
-                    except Exception as e:
-                        print(f"Error processing {url}: {e}")
-                    
-                    # Respect delay
-                    time.sleep(self.delay)
+        # Stream pages to disk as they arrive rather than holding them all in memory
+        filename = f"usm_rag_content_{start_time.strftime('%Y%m%d_%H%M%S')}.txt"
+        self._out = open(filename, 'w', encoding='utf-8', buffering=1 << 20)
+        try:
+            asyncio.run(self._crawl(url_queue, start_time))
+        finally:
+            self._out.close()
         
-        # Save results
-        self.save_results()
+        print(f"💾 RAG content saved to: {filename}")
         
         # Print summary
         elapsed = (datetime.now() - start_time).total_seconds()
-        total_content = sum(len(page) for page in self.content_pages)
-        avg_content = total_content / len(self.content_pages) if self.content_pages else 0
+        avg_content = self.total_content / self.content_pages if self.content_pages else 0
         
         print("\n" + "=" * 60)
         print("✅ RAG-Optimized Crawling Completed!")
-        print(f"📄 Content pages: {len(self.content_pages):,}")
-        print(f"📝 Total content: {total_content:,} characters")
+        print(f"📄 Content pages: {self.content_pages:,}")
+        print(f"📝 Total content: {self.total_content:,} characters")
         print(f"📊 Average content: {avg_content:.0f} characters")
         print(f"⏱️  Time elapsed: {elapsed:.1f} seconds")
         print("=" * 60)
     
-    def save_results(self):
-        """Save results as simple text file for RAG"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"usm_rag_content_{timestamp}.txt"
+    async def _crawl(self, url_queue, start_time):
+        """Fetch queued URLs in batches over one pooled HTTP/2 client"""
+        semaphore = asyncio.Semaphore(self.max_workers)
+        limits = httpx.Limits(max_keepalive_connections=50, max_connections=100, keepalive_expiry=30)
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            for i, content in enumerate(self.content_pages, 1):
-                f.write(f"=== PAGE {i} ===\n")
-                f.write(content)
-                f.write("\n\n" + "="*80 + "\n\n")
+        async def bounded_crawl(client, url):
+            # Wait for the host's slot before taking a worker, so waiting doesn't hold one
+            await self.throttle(url)
+            async with semaphore:
+                return await self.crawl_page(client, url)
         
-        print(f"💾 RAG content saved to: {filename}")
+        async with httpx.AsyncClient(http2=True, headers=self.headers, limits=limits,
+                                     timeout=30, follow_redirects=True) as client:
+            while url_queue and len(self.visited_urls) < self.max_pages:
+                # Get batch of URLs to process
+                batch_size = min(20, len(url_queue))
+                batch = [url_queue.popleft() for _ in range(batch_size)]
+                
+                # Mark URLs visited before fetching so no URL is ever fetched twice
+                new_urls = []
+                for url, fp in batch:
+                    if fp not in self.visited_urls:
+                        self.visited_urls.add(fp)
+                        new_urls.append(url)
+                
+                if not new_urls:
+                    continue
+                
+                # Process batch concurrently
+                results = await asyncio.gather(*(bounded_crawl(client, url) for url in new_urls))
+                
+                for content, links in results:
+                    if content:
+                        saved = self.save_page(content)
+                        
+                        # Add new links to queue
+                        for link_url in links:
+                            self.enqueue(url_queue, link_url)
+                        
+                        # Progress update
+                        if saved and self.content_pages % 20 == 0:
+                            elapsed = (datetime.now() - start_time).total_seconds()
+                            print(f"📄 Content pages: {self.content_pages:,} | "
+                                  f"Queue: {len(url_queue):,} | "
+                                  f"Time: {elapsed:.1f}s")
+    
+    def save_page(self, content):
+        """Append one page to the RAG text file unless identical text was already saved"""
+        # Templated pages often extract to the same text; keep one copy of each
+        fp = self._fingerprint(content)
+        if fp in self._content_fps:
+            return False
+        self._content_fps.add(fp)
+        
+        self.content_pages += 1
+        self.total_content += len(content)
+        self._out.write(f"=== PAGE {self.content_pages} ===\n{content}\n\n{'=' * 80}\n\n")
+        return True
 
 
 if __name__ == '__main__':
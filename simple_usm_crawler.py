@@ -5,14 +5,23 @@ Simple USM Website Crawler - No Unicode Issues
 
 import asyncio
 import json
-import requests
+import httpx
 from datetime import datetime
 from bs4 import BeautifulSoup
 import time
 import re
+from urllib.parse import urlparse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 class SimpleUSMCrawler:
-    def __init__(self):
+    def __init__(self, max_workers=10, delay=0.5):
+        self.max_workers = max_workers
+        self.delay = delay  # Minimum gap between requests to the same host
+        self._next_ok = {}  # host -> monotonic time of its next allowed request
         self.results = []
         self.visited_urls = set()
         self.start_urls = [
@@ -36,10 +45,21 @@ class SimpleUSMCrawler:
             'https://www.usm.edu/alumni/',
         ]
         
+        # Add headers to avoid blocking
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        
+        self._ws_re = re.compile(r'\s+')
+        
+        # Only HTML bodies are downloaded, and at most max_body_bytes of each
+        self._html_types = ('text/html', 'application/xhtml+xml')
+        self.max_body_bytes = 2 * 1024 * 1024
+        
     def extract_content(self, html, url):
         """Extract clean content from HTML"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            soup = BeautifulSoup(html, 'lxml')
             
             # Remove script and style elements
             for script in soup(["script", "style", "nav", "footer", "header"]):
@@ -48,10 +68,8 @@ class SimpleUSMCrawler:
             # Get text content
             text = soup.get_text()
             
-            # Clean up text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
+            # Clean up text: collapse every whitespace run to a single space
+            text = self._ws_re.sub(' ', text).strip()
             
             # Extract title
             title = soup.find('title')
@@ -75,25 +93,57 @@ class SimpleUSMCrawler:
             print(f"Error extracting content from {url}: {e}")
             return None
     
-    def crawl_page(self, url, depth=0, max_depth=2):
+    async def throttle(self, url):
+        """Space out requests to the same host by self.delay"""
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        # Reserve the next slot before awaiting so concurrent tasks queue up behind it
+        slot = max(now, self._next_ok.get(host, 0.0))
+        self._next_ok[host] = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+    
+    async def fetch_html(self, client, url):
+        """Stream a GET and return (body, charset), or None when the response isn't HTML"""
+        async with client.stream('GET', url) as response:
+            response.raise_for_status()
+            
+            # Decide from the headers alone, so PDFs and media are never downloaded
+            content_type = response.headers.get('content-type', '').lower()
+            if content_type and not content_type.startswith(self._html_types):
+                return None
+            
+            # Stop reading once the page passes the size cap
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes(65536):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_body_bytes:
+                    break
+            return b''.join(chunks), response.charset_encoding
+    
+    async def crawl_page(self, client, url, depth=0, max_depth=2):
         """Crawl a single page"""
         if url in self.visited_urls or depth > max_depth:
             return []
             
         self.visited_urls.add(url)
-        print(f"Crawling: {url} (depth: {depth})")
         
         try:
-            # Add headers to avoid blocking
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
+            # Small delay to be respectful
+            await self.throttle(url)
+            print(f"Crawling: {url} (depth: {depth})")
             
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
+            fetched = await self.fetch_html(client, url)
+            if fetched is None:
+                print(f"Skipped {url} - not HTML")
+                return []
+            body, charset = fetched
+            html = body.decode(charset or 'utf-8', errors='replace')
             
-            # Extract content
-            extracted = self.extract_content(response.text, url)
+            # Extract content off the event loop; parsing is CPU-bound
+            extracted = await asyncio.to_thread(self.extract_content, html, url)
             
             if extracted and len(extracted['content']) > 100:  # Only save substantial content
                 page_data = {
@@ -138,25 +188,7 @@ class SimpleUSMCrawler:
         depth = 0
         max_depth = 2
         
-        while current_level_urls and depth <= max_depth:
-            print(f"\nLevel {depth}: Processing {len(current_level_urls)} URLs...")
-            
-            new_links = []
-            for url in current_level_urls:
-                found_links = self.crawl_page(url, depth, max_depth)
-                new_links.extend(found_links)
-                
-                # Small delay to be respectful
-                time.sleep(0.5)
-            
-            # Move to next level
-            current_level_urls = list(set(new_links))  # Remove duplicates
-            depth += 1
-            
-            # Progress update
-            successful_pages = [r for r in self.results if r.get('success', False)]
-            total_content = sum(len(r.get('content', '')) for r in successful_pages)
-            print(f"Progress: {len(self.results)} pages, {len(successful_pages)} successful, {total_content:,} characters")
+        asyncio.run(self._crawl_levels(current_level_urls, depth, max_depth))
         
         # Save results
         self.save_results()
@@ -173,34 +205,67 @@ class SimpleUSMCrawler:
         print(f"Average content: {total_content/len(successful_pages) if successful_pages else 0:.0f} characters")
         print("=" * 60)
     
+    async def _crawl_levels(self, current_level_urls, depth, max_depth):
+        """Crawl level by level, fetching each level's URLs concurrently"""
+        semaphore = asyncio.Semaphore(self.max_workers)
+        limits = httpx.Limits(max_keepalive_connections=50, max_connections=100, keepalive_expiry=30)
+        
+        async def bounded_crawl(client, url):
+            async with semaphore:
+                return await self.crawl_page(client, url, depth, max_depth)
+        
+        # Reuse one pooled HTTP/2 connection to www.usm.edu for every request
+        async with httpx.AsyncClient(http2=True, headers=self.headers, limits=limits,
+                                     timeout=10, follow_redirects=True) as client:
+            while current_level_urls and depth <= max_depth:
+                print(f"\nLevel {depth}: Processing {len(current_level_urls)} URLs...")
+                
+                found_links = await asyncio.gather(*(bounded_crawl(client, url) for url in current_level_urls))
+                new_links = [link for links in found_links for link in links]
+                
+                # Move to next level
+                current_level_urls = list(set(new_links))  # Remove duplicates
+                depth += 1
+                
+                # Progress update
+                successful_pages = [r for r in self.results if r.get('success', False)]
+                total_content = sum(len(r.get('content', '')) for r in successful_pages)
+                print(f"Progress: {len(self.results)} pages, {len(successful_pages)} successful, {total_content:,} characters")
+    
     def save_results(self):
         """Save results to files"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         # Save detailed JSON
         json_filename = f"usm_simple_crawl_{timestamp}.json"
-        with open(json_filename, 'w', encoding='utf-8') as f:
-            json.dump({
-                'crawl_stats': {
-                    'total_pages': len(self.results),
-                    'successful_pages': len([r for r in self.results if r.get('success', False)]),
-                    'total_content': sum(len(r.get('content', '')) for r in self.results),
-                    'timestamp': datetime.now().isoformat()
-                },
-                'pages': self.results
-            }, f, indent=2, ensure_ascii=False)
+        data = {
+            'crawl_stats': {
+                'total_pages': len(self.results),
+                'successful_pages': len([r for r in self.results if r.get('success', False)]),
+                'total_content': sum(len(r.get('content', '')) for r in self.results),
+                'timestamp': datetime.now().isoformat()
+            },
+            'pages': self.results
+        }
+        if orjson is not None:
+            # orjson emits UTF-8 bytes directly, so skip the text-mode encode
+            with open(json_filename, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(json_filename, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
         
         # Save clean text for RAG
         txt_filename = f"usm_simple_rag_{timestamp}.txt"
-        with open(txt_filename, 'w', encoding='utf-8') as f:
+        # One formatted write per page through a 1 MB buffer instead of six small writes
+        with open(txt_filename, 'w', encoding='utf-8', buffering=1 << 20) as f:
             for i, page in enumerate(self.results, 1):
                 if page.get('success', False) and page.get('content'):
-                    f.write(f"=== PAGE {i}: {page.get('title', 'No Title')} ===\n")
-                    f.write(f"URL: {page['url']}\n")
-                    f.write(f"Depth: {page.get('depth', 0)}\n")
-                    f.write(f"Links Found: {page.get('links_found', 0)}\n\n")
-                    f.write(page['content'])
-                    f.write("\n\n" + "="*80 + "\n\n")
+                    f.write(f"=== PAGE {i}: {page.get('title', 'No Title')} ===\n"
+                            f"URL: {page['url']}\n"
+                            f"Depth: {page.get('depth', 0)}\n"
+                            f"Links Found: {page.get('links_found', 0)}\n\n"
+                            f"{page['content']}\n\n{'=' * 80}\n\n")
         
         print(f"Results saved to:")
         print(f"   JSON: {json_filename}")
@@ -1,105 +1,282 @@
 import scrapy
 from scrapy.crawler import CrawlerProcess
+from scrapy.exceptions import CloseSpider
+from scrapy.http import HtmlResponse
 from scrapy.utils.project import get_project_settings
+from scrapy.linkextractors import IGNORED_EXTENSIONS
+from twisted.python.failure import Failure
+from lxml import etree
 from datetime import datetime
+import asyncio
+import heapq
+import httpx
 import os
 import json
-from urllib.parse import urljoin, urlparse
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from itertools import chain, count
+from urllib.parse import urljoin, urlparse, urlsplit, urlunsplit
+from w3lib.url import canonicalize_url
 import logging
 from typing import Dict, List, Set
 import sys
 
+try:
+    from xxhash import xxh3_64_intdigest
+except ImportError:
+    xxh3_64_intdigest = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-# Global variables to store crawling results
-crawl_results = []
+# Boilerplate phrases stripped from page text, as one case-insensitive alternation
+_UNWANTED_RE = re.compile(
+    r'Cookie\s*policy|Privacy\s*policy|Terms\s*of\s*service|Subscribe\s*to\s*newsletter|'
+    r'Follow\s*us\s*on|Share\s*this|Read\s*more|Click\s*here|Learn\s*more',
+    re.IGNORECASE
+)
+
+# hrefs that never lead to a crawlable page
+_SKIP_PREFIXES = ('#', 'javascript:', 'mailto:', 'tel:')
+# Scrapy's LinkExtractor deny list (documents, media, archives), as endswith suffixes
+_IGNORED_SUFFIXES = tuple('.' + ext for ext in IGNORED_EXTENSIONS)
+
+# Elements whose own text nodes feed the page text (headings, paragraphs, list items, divs)
+_TEXT_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'li', 'div')
+
+# Precompiled XPaths run directly on lxml elements; each matches what the parsel CSS
+# selector it replaced returned, without per-call CSS translation and Selector wrapping
+_class_is = lambda name: f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+_TITLE_TEXT = etree.XPath('descendant-or-self::title/text()')
+_TABLES = etree.XPath('descendant-or-self::table')
+_CONTENT_DIVS = etree.XPath('descendant-or-self::*[' + ' or '.join(
+    _class_is(name) for name in ('columns__item', 'content', 'main-content', 'article-content')) + ']')
+_TH_TEXT = etree.XPath('descendant-or-self::th/text()')
+_ROWS = etree.XPath('descendant-or-self::tr')
+_CELL_TEXT = etree.XPath('descendant-or-self::*[self::td or self::th]/text()')
+_HEADING_TEXT = etree.XPath('descendant-or-self::*[' + ' or '.join(f'self::h{i}' for i in range(1, 7)) + ']/text()')
+_P_TEXT = etree.XPath('descendant-or-self::p/text()')
+_LI_TEXT = etree.XPath('descendant-or-self::li/text()')
+_LINKS = etree.XPath('descendant-or-self::a[@href]')
+# Links inside nav, header, or navigation elements ("navigation" classes also contain "nav")
+_NAV_LINKS = etree.XPath('//*[self::nav or self::header or contains(@class, "nav")]//a[@href]')
+
+# Global variables to store crawling results; pages themselves are streamed to
+# results_file as they are crawled, only the first few are kept for the summary
+sample_pages = []
+results_file = None
+results_path = None
 crawl_stats = {
     'pages_crawled': 0,
     'total_urls': 0,
+    'total_content': 0,
     'errors': 0,
     'start_time': None,
     'end_time': None
 }
 
+def json_line(obj):
+    """Serialize obj as one UTF-8 JSON Lines record"""
+    if orjson is not None:
+        return orjson.dumps(obj) + b'\n'
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8') + b'\n'
+
+def reset_crawl_state():
+    """Reset the global stats and open a fresh results file for a new crawl"""
+    global sample_pages, crawl_stats, results_file, results_path
+    
+    sample_pages = []
+    crawl_stats = {
+        'pages_crawled': 0,
+        'total_urls': 0,
+        'total_content': 0,
+        'errors': 0,
+        'start_time': datetime.now().isoformat(),
+        'end_time': None
+    }
+    
+    # Written as .part and renamed by save_results_to_file once the crawl stats are appended
+    results_path = f"crawl_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    results_file = open(results_path + '.part', 'wb', buffering=1 << 16)
+
+def write_page(page_data):
+    """Append one crawled page to the results file"""
+    results_file.write(json_line(page_data))
+    crawl_stats['total_content'] += page_data['content_length']
+    if len(sample_pages) < 5:
+        sample_pages.append(page_data)
+
+# (whole second, its isoformat) of the last page_timestamp() call
+_timestamp_cache = [None, '']
+
+def page_timestamp():
+    """Local time to the second in ISO format, formatted once per second rather than per page"""
+    now = int(time.time())
+    if _timestamp_cache[0] != now:
+        _timestamp_cache[0] = now
+        _timestamp_cache[1] = datetime.fromtimestamp(now).isoformat()
+    return _timestamp_cache[1]
+
+def text_key(text):
+    """Return a 64-bit key for deduplicating a string"""
+    # 64-bit keys collide with probability ~n^2/2^65 (about 1e-9 at 200k keys),
+    # so unlike a Bloom filter nothing is wrongly skipped in practice
+    if xxh3_64_intdigest is None:
+        return hash(text)
+    return xxh3_64_intdigest(text.encode('utf-8'))
+
+def url_key(url):
+    """Return a 64-bit key for visited-URL dedup"""
+    return text_key(url)
+
+# Per-process spider used by the extraction pool's workers
+_worker_spider = None
+
+def _init_extract_worker(start_url):
+    """Pool initializer: build the spider whose extraction methods this worker runs"""
+    global _worker_spider
+    _worker_spider = LocalWebSpider(start_url, extract_workers=0)
+
+def _extract_page(url, body, encoding):
+    """Run extract_comprehensive_content on a page's raw body in a pool worker"""
+    response = HtmlResponse(url=url, body=body, encoding=encoding)
+    return _worker_spider.extract_comprehensive_content(response)
+
+def spider_settings(concurrent_requests=16, download_delay=0.5):
+    """Scrapy settings for a LocalWebSpider crawl"""
+    return {
+        'ROBOTSTXT_OBEY': False,
+        'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'LOG_LEVEL': 'INFO',
+        'CONCURRENT_REQUESTS': concurrent_requests,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': concurrent_requests,
+        # AutoThrottle starts at download_delay and then follows measured latency, so fast
+        # servers aren't held to a fixed gap; there is no DOWNLOAD_DELAY floor under it
+        'AUTOTHROTTLE_ENABLED': True,
+        'AUTOTHROTTLE_START_DELAY': download_delay,
+        'AUTOTHROTTLE_MAX_DELAY': 5.0,
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': concurrent_requests * 0.75,
+        'AUTOTHROTTLE_DEBUG': False,
+        'SCHEDULER_PRIORITY_QUEUE': 'scrapy.pqueues.DownloaderAwarePriorityQueue',
+        'COOKIES_ENABLED': False,
+        'DOWNLOAD_TIMEOUT': 5,  # Very short timeout
+        'HTTPCACHE_ENABLED': True,
+        'HTTPCACHE_EXPIRATION_SECS': 3600,
+        'RETRY_TIMES': 1,  # Only retry once
+        'RETRY_HTTP_CODES': [500, 502, 503, 504, 408, 429],
+        'DOWNLOAD_MAXSIZE': 10485760,  # 10MB max page size
+        # The HTTP/1.1 handler sizes its persistent pool per host from
+        # CONCURRENT_REQUESTS_PER_DOMAIN, so every slot keeps its connection alive
+        'REACTOR_THREADPOOL_MAXSIZE': max(concurrent_requests * 2, 20),  # DNS lookups
+        'AJAXCRAWL_ENABLED': False,
+        # parse awaits the extraction pool's futures through asyncio, which needs this reactor;
+        # it is only Scrapy's default from 2.13 on
+        'TWISTED_REACTOR': 'twisted.internet.asyncioreactor.AsyncioSelectorReactor',
+    }
+
 class LocalWebSpider(scrapy.Spider):
     name = 'local_web_spider'
     
     def __init__(self, start_url, max_pages=100, concurrent_requests=16, 
-                 download_delay=0.5, *args, **kwargs):
+                 download_delay=0.5, extract_workers=None, *args, **kwargs):
         super(LocalWebSpider, self).__init__(*args, **kwargs)
         self.start_urls = [start_url]
         self.allowed_domains = [urlparse(start_url).netloc]
+        # Host (and non-default port) links must match exactly, in canonical form
+        self._allowed_netloc = urlsplit(self._canonicalize(start_url)).netloc
         self.MAX_PAGES = max_pages
         self.pages_crawled = 0
-        self.visited_urls = set()
+        self.visited_urls = set()  # url_key() of every crawled URL, not the URL strings
         self.homepage_links = set()
+        self.seen_tables = set()  # text_key() of every table section already emitted, across pages
         
         # Breadth-first traversal queues
-        self.current_level_urls = []  # URLs to crawl in current level
-        self.next_level_urls = []     # URLs to crawl in next level
+        self.current_level_urls = deque()  # URLs to crawl in current level
+        self.next_level_urls = deque()     # URLs to crawl in next level
         self.current_level = 0
         self.is_processing_level = False
         self.level_complete = False
         
-        self.custom_settings = {
-            'ROBOTSTXT_OBEY': False,
-            'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'LOG_LEVEL': 'INFO',
-            'CONCURRENT_REQUESTS': concurrent_requests,
-            'CONCURRENT_REQUESTS_PER_DOMAIN': concurrent_requests,
-            'DOWNLOAD_DELAY': download_delay,
-            'COOKIES_ENABLED': False,
-            'DOWNLOAD_TIMEOUT': 5,  # Very short timeout
-            'HTTPCACHE_ENABLED': True,
-            'HTTPCACHE_EXPIRATION_SECS': 3600,
-            'RETRY_TIMES': 1,  # Only retry once
-            'RETRY_HTTP_CODES': [500, 502, 503, 504, 408, 429],
-            'DOWNLOAD_MAXSIZE': 10485760,  # 10MB max page size
-        }
+        self.custom_settings = spider_settings(concurrent_requests, download_delay)
+        
+        # Content extraction is CPU-bound; worker processes run it so the event loop keeps
+        # downloading meanwhile. extract_workers=0 extracts inline in parse instead
+        if extract_workers is None:
+            extract_workers = os.cpu_count() or 1
+        self._extract_workers = extract_workers
+        self._pool = None  # started by _extract_pool on the first page that needs it
 
     def start_requests(self):
         """Initialize crawling with custom headers"""
         headers = {
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive',
         }
         for url in self.start_urls:
-            yield scrapy.Request(url=url, headers=headers, callback=self.parse_homepage)
-
-    def parse_homepage(self, response):
-        """Special parser for homepage to ensure all main sections are captured"""
-        logging.info("\nProcessing Homepage...")
-
-        links = response.css('a::attr(href)').getall()
-        for link in links:
-            if link:
-                absolute_url = urljoin(response.url, link)
-                if self.allowed_domains[0] in absolute_url and absolute_url not in self.visited_urls:
-                    self.homepage_links.add(absolute_url)
-                    yield scrapy.Request(
-                        url=absolute_url,
-                        callback=self.parse,
-                        priority=100,
-                        errback=self.handle_error
-                    )
+            yield scrapy.Request(url=url, headers=headers, callback=self.parse, meta={'is_homepage': True})
+
+    async def start(self):
+        """Scrapy 2.13+ entry point; the default one ignores start_requests"""
+        for request in self.start_requests():
+            yield request
+
+    def _extract_pool(self):
+        """The extraction process pool, started on first use"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self._extract_workers, initializer=_init_extract_worker,
+                                             initargs=(self.start_urls[0],))
+        return self._pool
+
+    def _canonicalize(self, url):
+        """Canonical form of a URL so spellings of the same page share one visited key"""
+        # w3lib sorts the query, drops the fragment and lowercases scheme and host;
+        # default ports are dropped here. Trailing slashes are kept, /a and /a/ can differ
+        try:
+            parts = urlsplit(canonicalize_url(url))
+            netloc = parts.netloc
+            if (parts.scheme, parts.port) in (('http', 80), ('https', 443)):
+                netloc = netloc.rsplit(':', 1)[0]
+        except ValueError:
+            return url
+        return urlunsplit((parts.scheme, netloc, parts.path, parts.query, ''))
 
-        logging.info(f"Found {len(self.homepage_links)} main sections on homepage")
-        yield from self.parse(response)
+    def _should_follow(self, absolute_url):
+        """True for an unvisited page on the start host that isn't a binary download"""
+        parts = urlsplit(absolute_url)
+        return (parts.netloc == self._allowed_netloc and
+                not parts.path.lower().endswith(_IGNORED_SUFFIXES) and
+                url_key(absolute_url) not in self.visited_urls)
 
-    def parse(self, response):
+    async def parse(self, response):
         """Parse pages and follow all links"""
         if self.pages_crawled >= self.MAX_PAGES:
             raise scrapy.exceptions.CloseSpider(reason='Reached maximum pages')
 
-        if response.url in self.visited_urls:
+        # Requests we issued carry their canonical URL; redirected or start pages need it computed
+        if 'canonical_url' in response.meta and 'redirect_urls' not in response.meta:
+            canonical_url = response.meta['canonical_url']
+        else:
+            canonical_url = self._canonicalize(response.url)
+        key = url_key(canonical_url)
+        if key in self.visited_urls:
             return
 
-        self.visited_urls.add(response.url)
+        self.visited_urls.add(key)
         self.pages_crawled += 1
 
         # Update global stats
@@ -112,14 +289,37 @@ class LocalWebSpider(scrapy.Spider):
         if self.pages_crawled % 10 == 0:
             print(f"⏳ Progress: {self.pages_crawled}/{self.MAX_PAGES} pages ({self.pages_crawled/self.MAX_PAGES*100:.1f}%)")
         
+        # Error stubs and non-HTML bodies have nothing to extract or follow
+        content_type = response.headers.get(b'Content-Type', b'text/html').lower()
+        if response.status != 200 or b'html' not in content_type or len(response.body) < 512:
+            write_page({
+                'url': response.url,
+                'title': '',
+                'content': '',
+                'content_length': 0,
+                'headings': [],
+                'links': [],
+                'timestamp': page_timestamp()
+            })
+            return
+
         # Debug: Show what content types we found
         if self.pages_crawled <= 3:  # Only for first 3 pages
             tables_found = len(response.css('table').getall())
             columns_found = len(response.css('.columns__item').getall())
             print(f"🔍 Debug - Tables: {tables_found}, Column divs: {columns_found}")
 
-        # Extract comprehensive content for RAG
-        content_data = self.extract_comprehensive_content(response)
+        # Extract comprehensive content for RAG, in the pool when there is one
+        if not self._extract_workers:
+            content_data = self.extract_comprehensive_content(response)
+        else:
+            content_data = await asyncio.wrap_future(
+                self._extract_pool().submit(_extract_page, response.url, response.body, response.encoding))
+        
+        # Tables are deduplicated across the whole crawl, so structuring runs here on seen_tables
+        if 'clean_text' in content_data:
+            content_data['full_text'] = self.structure_content_for_rag(content_data.pop('clean_text'),
+                                                                       content_data['title'])
 
         # Store results
         page_data = {
@@ -129,43 +329,47 @@ class LocalWebSpider(scrapy.Spider):
             'content_length': len(content_data.get('full_text', '')),
             'headings': content_data.get('headings', []),
             'links': content_data.get('links', []),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': page_timestamp()
         }
-        crawl_results.append(page_data)
+        write_page(page_data)
 
         # Follow links - prioritize content links over navigation
-        all_links = response.css('a[href]')
+        root = response.selector.root
+        all_links = _LINKS(root)
+        
+        # Navigation links, found in one pass instead of four ancestor queries per link
+        nav_elements = set(_NAV_LINKS(root))
         
         # First, get content links (from main content area)
         content_links = []
         nav_links = []
         
         for link in all_links:
-            href = link.css('::attr(href)').get()
-            if href and not href.startswith('#') and not href.startswith('javascript:'):
-                absolute_url = urljoin(response.url, href)
-                if self.allowed_domains[0] in absolute_url and absolute_url not in self.visited_urls:
-                    # Check if it's a navigation link by looking at parent elements
-                    is_nav_link = False
-                    # Check if link is inside nav, header, or navigation elements
-                    if (link.xpath('ancestor::nav') or 
-                        link.xpath('ancestor::header') or 
-                        link.xpath('ancestor::*[contains(@class, "navigation")]') or
-                        link.xpath('ancestor::*[contains(@class, "nav")]')):
-                        is_nav_link = True
-                    
-                    if is_nav_link:
+            href = link.get('href')
+            if href and not href.startswith(_SKIP_PREFIXES):
+                absolute_url = self._canonicalize(urljoin(response.url, href))
+                if self._should_follow(absolute_url):
+                    if link in nav_elements:
                         nav_links.append(absolute_url)
                     else:
                         content_links.append(absolute_url)
         
+        # The homepage links to the site's main sections; crawl those ahead of everything else
+        priority = 0
+        if response.meta.get('is_homepage'):
+            priority = 100
+            self.homepage_links.update(content_links, nav_links)
+            logging.info(f"Found {len(self.homepage_links)} main sections on homepage")
+        
         # Follow content links first, then navigation links
-        for url in content_links + nav_links:
+        for url in chain(content_links, nav_links):
             if self.pages_crawled < self.MAX_PAGES:
                     yield scrapy.Request(
                     url=url,
                         callback=self.parse,
-                        errback=self.handle_error
+                        priority=priority,
+                        errback=self.handle_error,
+                        meta={'canonical_url': url}
                     )
 
     def extract_comprehensive_content(self, response):
@@ -174,16 +378,27 @@ class LocalWebSpider(scrapy.Spider):
         
         try:
             # Extract page title
-            title = response.css('title::text').get()
-            content_data['title'] = title.strip() if title else ''
+            title = _TITLE_TEXT(response.selector.root)
+            content_data['title'] = title[0].strip() if title else ''
             
-            # Get main content area with safety limits
+            # Get main content area with safety limits; extraction works on the lxml elements
             main_content = response.css('body')
+            bodies = [body.root for body in main_content]
+            
+            # One walk over the body collects the direct text nodes of every tag in _TEXT_TAGS,
+            # per tag in document order - what a separate 'tag::text' selector per tag returned
+            text_nodes = {tag: [] for tag in _TEXT_TAGS}
+            for body in bodies:
+                for element in body.iter(*_TEXT_TAGS):
+                    nodes = text_nodes[element.tag]
+                    if element.text is not None:
+                        nodes.append(element.text)
+                    nodes.extend(child.tail for child in element if child.tail is not None)
             
             # Extract headings (h1-h6) with hierarchy - limit to 50 headings
             headings = []
             for i in range(1, 7):
-                heading_texts = main_content.css(f'h{i}::text').getall()[:10]  # Limit per level
+                heading_texts = text_nodes[f'h{i}'][:10]  # Limit per level
                 for heading in heading_texts:
                     if heading.strip() and len(headings) < 50:
                         headings.append({
@@ -196,36 +411,38 @@ class LocalWebSpider(scrapy.Spider):
             text_elements = []
             
             # Paragraphs - limit to 100 paragraphs
-            paragraphs = main_content.css('p::text').getall()[:100]
+            paragraphs = text_nodes['p'][:100]
             text_elements.extend([('p', p.strip()) for p in paragraphs if p.strip()])
             
             # List items - limit to 200 items
-            list_items = main_content.css('li::text').getall()[:200]
+            list_items = text_nodes['li'][:200]
             text_elements.extend([('li', li.strip()) for li in list_items if li.strip()])
             
             # Extract table content properly
-            tables = main_content.css('table')
+            tables = [table for body in bodies for table in _TABLES(body)]
             for table in tables[:10]:  # Limit to 10 tables
                 table_text = self.extract_table_content(table)
                 if table_text:
                     text_elements.append(('table', table_text))
             
             # Extract content from specific div classes (like columns__item)
-            column_divs = main_content.css('.columns__item, .content, .main-content, .article-content')
+            column_divs = [div for body in bodies for div in _CONTENT_DIVS(body)]
             for div in column_divs[:20]:  # Limit to 20 content divs
                 div_text = self.extract_div_content(div)
                 if div_text:
                     text_elements.append(('content_div', div_text))
             
             # Div content - limit to 50 divs
-            divs = main_content.css('div::text').getall()[:50]
+            divs = text_nodes['div'][:50]
             text_elements.extend([('div', div.strip()) for div in divs if div.strip() and len(div.strip()) > 20])
             
             # Combine all text with structure
             full_text_parts = []
             for element_type, text in text_elements:
-                if text and len(text) > 5 and len(full_text_parts) < 500:  # Limit total elements
+                if text and len(text) > 5:
                     full_text_parts.append(text)
+                    if len(full_text_parts) == 500:  # Limit total elements
+                        break
             
             # Join all text content with better structure
             full_text = '\n\n'.join(full_text_parts)
@@ -238,12 +455,8 @@ class LocalWebSpider(scrapy.Spider):
             if len(full_text) > 50000:  # 50KB limit
                 full_text = full_text[:50000] + "... [Content truncated]"
             
-            # Clean up the text
-            full_text = self.clean_text_for_rag(full_text)
-            
-            # Add document structure for better RAG understanding
-            structured_content = self.structure_content_for_rag(full_text, content_data.get('title', ''))
-            content_data['full_text'] = structured_content
+            # Clean up the text; parse adds the document structure for better RAG understanding
+            content_data['clean_text'] = self.clean_text_for_rag(full_text)
             
             # Extract links for context - prioritize A to Z content links
             links = []
@@ -262,35 +475,31 @@ class LocalWebSpider(scrapy.Spider):
                     '.grid a[href]'
                 ]
                 
-                for selector in content_selectors:
-                    content_links = response.css(selector)
-                    for link in content_links:
-                        href = link.css('::attr(href)').get()
-                        text = link.css('::text').get()
-                        if href and text and text.strip():
-                            # Skip navigation, anchor, and external links
-                            if (not href.startswith('#') and 
-                                not href.startswith('javascript:') and
-                                'usm.edu' in href and
-                                len(text.strip()) > 1):  # Avoid single character links
-                                links.append({
-                                    'url': urljoin(response.url, href),
-                                    'text': text.strip()
-                                })
-                                if len(links) >= 100:  # Limit for A to Z page
-                                    break
-                    if len(links) >= 100:
-                        break
+                # One union selector walks the tree once; each link comes back once, in document order
+                content_links = response.css(', '.join(content_selectors))
+                for link in content_links:
+                    href, text = self.anchor_href_text(link.root)
+                    if href and text and text.strip():
+                        # Skip navigation, anchor, and external links
+                        if (not href.startswith('#') and 
+                            not href.startswith('javascript:') and
+                            'usm.edu' in href and
+                            len(text.strip()) > 1):  # Avoid single character links
+                            links.append({
+                                'url': self._canonicalize(urljoin(response.url, href)),
+                                'text': text.strip()
+                            })
+                            if len(links) >= 100:  # Limit for A to Z page
+                                break
             else:
                 # For other pages, use the original logic
-                content_links = main_content.css('a[href]')
+                content_links = main_content.xpath('.//a[@href]')
                 for link in content_links[:50]:
-                    href = link.css('::attr(href)').get()
-                    text = link.css('::text').get()
+                    href, text = self.anchor_href_text(link.root)
                     if href and text and text.strip():
                         if not href.startswith('#') and not href.startswith('javascript:'):
                             links.append({
-                                'url': urljoin(response.url, href),
+                                'url': self._canonicalize(urljoin(response.url, href)),
                                 'text': text.strip()
                             })
             
@@ -307,21 +516,26 @@ class LocalWebSpider(scrapy.Spider):
         
         return content_data
     
+    def anchor_href_text(self, anchor):
+        """Return an <a> element's href and first descendant text, as ::attr(href) and ::text .get() would"""
+        # Read straight off the lxml element instead of running two selectors per link
+        return anchor.get('href'), next(anchor.itertext(), None)
+    
     def extract_table_content(self, table):
-        """Extract structured content from HTML tables in RAG-friendly format"""
+        """Extract structured content from an lxml table element in RAG-friendly format"""
         try:
             table_text = []
             
             # Extract headers
-            headers = table.css('thead th::text, th::text').getall()
+            headers = _TH_TEXT(table)
             if headers:
                 header_text = " | ".join([h.strip() for h in headers if h.strip()])
                 table_text.append(f"Table: {header_text}")
             
             # Extract rows with better formatting
-            rows = table.css('tbody tr, tr')
+            rows = _ROWS(table)
             for row in rows[:50]:  # Limit to 50 rows
-                cells = row.css('td::text, th::text').getall()
+                cells = _CELL_TEXT(row)
                 if cells:
                     # Create more natural language format
                     if len(cells) == 2:
@@ -341,31 +555,31 @@ class LocalWebSpider(scrapy.Spider):
             return ""
     
     def extract_div_content(self, div):
-        """Extract content from structured divs like columns__item"""
+        """Extract content from structured lxml div elements like columns__item"""
         try:
             content_parts = []
             
             # Extract headings within the div
-            headings = div.css('h1::text, h2::text, h3::text, h4::text, h5::text, h6::text').getall()
+            headings = _HEADING_TEXT(div)
             for heading in headings:
                 if heading.strip():
                     content_parts.append(f"Section: {heading.strip()}")
             
             # Extract paragraphs
-            paragraphs = div.css('p::text').getall()
+            paragraphs = _P_TEXT(div)
             for p in paragraphs:
                 if p.strip():
                     content_parts.append(p.strip())
             
             # Extract tables within the div
-            tables = div.css('table')
+            tables = _TABLES(div)
             for table in tables:
                 table_text = self.extract_table_content(table)
                 if table_text:
                     content_parts.append(table_text)
             
             # Extract list items
-            list_items = div.css('li::text').getall()
+            list_items = _LI_TEXT(div)
             for li in list_items:
                 if li.strip():
                     content_parts.append(f"• {li.strip()}")
@@ -378,40 +592,21 @@ class LocalWebSpider(scrapy.Spider):
     
     def clean_text_for_rag(self, text):
         """Clean and format text for RAG"""
-        # Remove excessive whitespace
+        # Remove excessive whitespace (this also leaves no newlines to collapse)
         text = ' '.join(text.split())
         
-        # Remove common unwanted patterns
-        unwanted_patterns = [
-            r'Cookie\s*policy',
-            r'Privacy\s*policy',
-            r'Terms\s*of\s*service',
-            r'Subscribe\s*to\s*newsletter',
-            r'Follow\s*us\s*on',
-            r'Share\s*this',
-            r'Read\s*more',
-            r'Click\s*here',
-            r'Learn\s*more',
-        ]
-        
-        import re
-        for pattern in unwanted_patterns:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-        
-        # Remove multiple consecutive newlines
-        text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
+        # Remove common unwanted patterns in a single scan
+        text = _UNWANTED_RE.sub('', text)
         
         return text.strip()
     
     def structure_content_for_rag(self, content, title):
         """Structure content for better RAG understanding"""
         try:
-            # Add document header
-            structured = f"Document: {title}\n"
-            structured += "=" * 50 + "\n\n"
+            # Collect pieces and join once; repeated += recopies the whole document
+            structured = [f"Document: {title}\n", "=" * 50 + "\n\n"]
             
             # Remove duplicates and organize content
-            seen_tables = set()
             sections = content.split('\n\n')
             current_section = ""
             
@@ -422,34 +617,34 @@ class LocalWebSpider(scrapy.Spider):
                 
                 # Handle table content - avoid duplicates
                 if section.startswith('Table:'):
-                    # Create a hash of the table content to detect duplicates
-                    table_hash = hash(section)
-                    if table_hash not in seen_tables:
-                        seen_tables.add(table_hash)
+                    # Tables repeated anywhere in the crawl (e.g. shared boilerplate) are kept once
+                    table_hash = text_key(section)
+                    if table_hash not in self.seen_tables:
+                        self.seen_tables.add(table_hash)
                         if current_section:
-                            structured += current_section + "\n\n"
-                        structured += section + "\n"
+                            structured.append(current_section + "\n\n")
+                        structured.append(section + "\n")
                         current_section = ""
                     continue
                 
                 # Handle section headers
                 if section.startswith('Section:'):
                     if current_section:
-                        structured += current_section + "\n\n"
-                    structured += section + "\n"
+                        structured.append(current_section + "\n\n")
+                    structured.append(section + "\n")
                     current_section = ""
                     continue
                 
                 # Regular text content
                 if current_section:
-                    structured += current_section + "\n\n"
+                    structured.append(current_section + "\n\n")
                 current_section = section
             
             # Add any remaining section
             if current_section:
-                structured += current_section + "\n\n"
+                structured.append(current_section + "\n\n")
             
-            return structured.strip()
+            return ''.join(structured).strip()
             
         except Exception as e:
             print(f"⚠️  Error structuring content: {str(e)}")
@@ -470,6 +665,8 @@ class LocalWebSpider(scrapy.Spider):
     def closed(self, reason):
         """Called when spider is closed"""
         crawl_stats['end_time'] = datetime.now().isoformat()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
         print(f"\n✅ Crawling completed!")
         print(f"📊 Total pages crawled: {self.pages_crawled}")
         print(f"🔗 Total unique URLs: {len(self.visited_urls)}")
@@ -478,17 +675,7 @@ class LocalWebSpider(scrapy.Spider):
 
 def crawl_website(url: str, max_pages: int = 100, concurrent_requests: int = 16, download_delay: float = 0.5):
     """Start crawling a website"""
-    global crawl_results, crawl_stats
-    
-    # Reset global variables
-    crawl_results = []
-    crawl_stats = {
-        'pages_crawled': 0,
-        'total_urls': 0,
-        'errors': 0,
-        'start_time': datetime.now().isoformat(),
-        'end_time': None
-    }
+    reset_crawl_state()
     
     print(f"🕷️  Starting to crawl: {url}")
     print(f"📊 Max pages: {max_pages}")
@@ -496,7 +683,10 @@ def crawl_website(url: str, max_pages: int = 100, concurrent_requests: int = 16,
     print(f"⏱️  Download delay: {download_delay}s")
     print("-" * 50)
     
-    process = CrawlerProcess(get_project_settings())
+    # Spider custom_settings are only read from the class, so pass the crawl's settings here
+    settings = get_project_settings()
+    settings.setdict(spider_settings(concurrent_requests, download_delay), priority='spider')
+    process = CrawlerProcess(settings)
     process.crawl(
         LocalWebSpider,
         start_url=url,
@@ -509,26 +699,139 @@ def crawl_website(url: str, max_pages: int = 100, concurrent_requests: int = 16,
         process.start()
     except Exception as e:
         print(f"❌ Crawling failed: {str(e)}")
+        discard_results()
         return False
     
     return True
 
-def save_results_to_file(filename: str = None):
-    """Save crawling results to a JSON file"""
-    if not filename:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"crawl_results_{timestamp}.json"
+def crawl_website_async(url: str, max_pages: int = 100, concurrent_requests: int = 16, download_delay: float = 0.5):
+    """Crawl a website with the same spider callbacks, fetching over asyncio + HTTP/2 instead of Twisted"""
+    reset_crawl_state()
     
-    results = {
-        'crawl_stats': crawl_stats,
-        'pages': crawl_results
-    }
+    print(f"🕷️  Starting to crawl (async): {url}")
+    print(f"📊 Max pages: {max_pages}")
+    print(f"⚡ Concurrent requests: {concurrent_requests}")
+    print(f"⏱️  Download delay: {download_delay}s")
+    print("-" * 50)
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    spider = LocalWebSpider(
+        start_url=url,
+        max_pages=max_pages,
+        concurrent_requests=concurrent_requests,
+        download_delay=download_delay
+    )
+    
+    # uvloop's libuv loop has cheaper socket syscalls than the default selector loop
+    if uvloop is not None:
+        uvloop.install()
     
+    try:
+        reason = asyncio.run(_run_async_crawl(spider, concurrent_requests, download_delay))
+    except Exception as e:
+        print(f"❌ Crawling failed: {str(e)}")
+        discard_results()
+        return False
+    
+    spider.closed(reason)
+    return True
+
+async def _run_async_crawl(spider, concurrent_requests, download_delay):
+    """Drive the spider's callbacks from a priority frontier; returns the close reason"""
+    frontier = []  # heap of (-priority, order, request): highest priority first, then FIFO
+    scheduled = set()  # url_key() of every request ever queued, like Scrapy's dupefilter
+    order = count()
+    next_ok = 0.0  # monotonic time of the next allowed request (single-host crawl)
+    
+    def schedule(request):
+        key = url_key(request.url)
+        if key not in scheduled:
+            scheduled.add(key)
+            heapq.heappush(frontier, (-request.priority, next(order), request))
+    
+    async def fetch(client, semaphore, request):
+        nonlocal next_ok
+        # Reserve the next delay slot before awaiting so concurrent fetches queue up behind it
+        now = time.monotonic()
+        slot = max(now, next_ok)
+        next_ok = slot + download_delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+        
+        async with semaphore:
+            try:
+                response = await client.get(request.url, headers=request.headers.to_unicode_dict())
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                failure = Failure(e)
+                failure.request = request
+                (request.errback or spider.handle_error)(failure)
+                return None
+        
+        # Only HTML is parsed, as the spider's selectors expect
+        if 'html' not in response.headers.get('content-type', 'text/html'):
+            return None
+        if response.history:
+            request.meta['redirect_urls'] = [str(r.url) for r in response.history]
+        # httpx has already decoded the body, so its Content-Encoding no longer applies
+        headers = {k: v for k, v in response.headers.items() if k != 'content-encoding'}
+        return HtmlResponse(url=str(response.url), status=response.status_code, headers=headers,
+                            body=response.content, request=request)
+    
+    async def process(response):
+        try:
+            async for result in response.request.callback(response):
+                if isinstance(result, scrapy.Request):
+                    schedule(result)
+        except CloseSpider as e:
+            return e.reason
+        except Exception as e:
+            print(f"⚠️  Error processing {response.url}: {str(e)}")
+        return None
+    
+    for request in spider.start_requests():
+        schedule(request)
+    
+    semaphore = asyncio.Semaphore(concurrent_requests)
+    limits = httpx.Limits(max_keepalive_connections=concurrent_requests, max_connections=concurrent_requests * 2)
+    async with httpx.AsyncClient(http2=True, limits=limits, timeout=spider.custom_settings['DOWNLOAD_TIMEOUT'],
+                                 headers={'User-Agent': spider.custom_settings['USER_AGENT']},
+                                 follow_redirects=True) as client:
+        while frontier:
+            batch = [heapq.heappop(frontier)[2] for _ in range(min(concurrent_requests, len(frontier)))]
+            responses = await asyncio.gather(*(fetch(client, semaphore, request) for request in batch))
+            
+            # The batch's callbacks overlap while their pages are extracted in the pool; each
+            # claims its page before awaiting, so spider state still needs no locking
+            reasons = await asyncio.gather(*(process(response) for response in responses if response is not None))
+            reason = next((reason for reason in reasons if reason), None)
+            if reason:
+                return reason
+    
+    return 'finished'
+
+def save_results_to_file(filename: str = None):
+    """Finish the streamed JSON Lines results: append crawl_stats as the last line and give the file its name"""
+    global results_file
+    if results_file is None:
+        print("❌ No crawl results to save")
+        return
+    
+    results_file.write(json_line({'crawl_stats': crawl_stats}))
+    results_file.close()
+    results_file = None
+    
+    filename = filename or results_path
+    os.replace(results_path + '.part', filename)
     print(f"💾 Results saved to: {filename}")
 
+def discard_results():
+    """Close and delete the streamed results of a crawl that won't be saved"""
+    global results_file
+    if results_file is not None:
+        results_file.close()
+        results_file = None
+        os.remove(results_path + '.part')
+
 def display_summary():
     """Display a summary of crawling results"""
     print("\n" + "="*60)
@@ -545,12 +848,11 @@ def display_summary():
     print(f"🔗 Unique URLs: {crawl_stats['total_urls']}")
     print(f"❌ Errors: {crawl_stats['errors']}")
     
-    if crawl_results:
-        total_content = sum(page.get('content_length', 0) for page in crawl_results)
-        print(f"📝 Total content length: {total_content:,} characters")
+    if sample_pages:
+        print(f"📝 Total content length: {crawl_stats['total_content']:,} characters")
         
         print(f"\n📋 Sample pages:")
-        for i, page in enumerate(crawl_results[:5]):  # Show first 5 pages
+        for i, page in enumerate(sample_pages):  # Show first 5 pages
             title = page.get('title', 'No title')[:50]
             print(f"  {i+1}. {title}...")
             print(f"     URL: {page['url']}")
@@ -592,8 +894,8 @@ def get_user_input():
         except ValueError:
             print("❌ Invalid input! Using default values.")
             max_pages, concurrent_requests, download_delay = 100, 16, 0.5
-    
-    return {
+        
+        return {
             'url': url,
             'max_pages': max_pages,
             'concurrent_requests': concurrent_requests,
@@ -625,26 +927,31 @@ if __name__ == "__main__":
         else:
             print("❌ No valid input provided. Exiting.")
     
-    # Option 2: Command line mode
+    # Option 2: Command line mode (--async fetches with httpx/asyncio instead of Scrapy)
     elif len(sys.argv) >= 2:
+        use_async = '--async' in sys.argv
+        if use_async:
+            sys.argv.remove('--async')
         url = sys.argv[1]
         max_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 100
         concurrent_requests = int(sys.argv[3]) if len(sys.argv) > 3 else 16
         download_delay = float(sys.argv[4]) if len(sys.argv) > 4 else 0.5
         save_results = sys.argv[5].lower() != 'nosave' if len(sys.argv) > 5 else True
         
-        success = crawl_website(url, max_pages, concurrent_requests, download_delay)
+        crawl = crawl_website_async if use_async else crawl_website
+        success = crawl(url, max_pages, concurrent_requests, download_delay)
         if success:
             display_summary()
             if save_results:
                 save_results_to_file()
             else:
+                discard_results()
                 print("\n💾 Results not saved (nosave option used)")
     
     else:
         print("Usage:")
         print("  python spiderCrawl.py                    # Interactive mode (auto-saves)")
-        print("  python spiderCrawl.py <url> [max_pages] [concurrent] [delay] [nosave]")
+        print("  python spiderCrawl.py <url> [max_pages] [concurrent] [delay] [nosave] [--async]")
         print("  Example: python spiderCrawl.py https://example.com 50 8 1.0")
         print("  Example: python spiderCrawl.py https://example.com 50 8 1.0 nosave")
 
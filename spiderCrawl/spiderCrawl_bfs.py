@@ -1,69 +1,202 @@
 import scrapy
 from scrapy.crawler import CrawlerProcess
+from scrapy.exceptions import CloseSpider
 from scrapy.utils.project import get_project_settings
+from scrapy.linkextractors import IGNORED_EXTENSIONS
+from selectolax.lexbor import LexborHTMLParser
 from datetime import datetime
 import os
+import time
+import hashlib
+from array import array
 import json
-from urllib.parse import urljoin, urlparse
+import re
+from urllib.parse import urljoin, urlparse, urlsplit, urlunsplit
+from w3lib.url import canonicalize_url, url_query_cleaner
 import logging
 from typing import Dict, List, Set
 import sys
 
-# Configure logging
+try:
+    from xxhash import xxh3_64_intdigest
+except ImportError:
+    xxh3_64_intdigest = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Configure logging; the one stderr handler filters at INFO itself, since Scrapy
+# sets its own loggers (and the root logger) to pass everything down to DEBUG
+_log_handler = logging.StreamHandler()
+_log_handler.setLevel(logging.INFO)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[_log_handler]
 )
 
-# Global variables to store crawling results
-crawl_results = []
-crawl_stats = {
-    'pages_crawled': 0,
-    'total_urls': 0,
-    'errors': 0,
-    'start_time': None,
-    'end_time': None
-}
+def json_line(obj):
+    """Serialize obj as one UTF-8 JSON Lines record"""
+    if orjson is not None:
+        return orjson.dumps(obj) + b'\n'
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8') + b'\n'
+
+_timestamp_cache = [None, '']
+
+def page_timestamp():
+    """Local time to the second in ISO format, formatted once per second rather than per page"""
+    now = int(time.time())
+    if _timestamp_cache[0] != now:
+        _timestamp_cache[0] = now
+        _timestamp_cache[1] = datetime.fromtimestamp(now).isoformat()
+    return _timestamp_cache[1]
+
+# Whitespace cleanup for page text: runs of blank lines, and runs of spaces/tabs
+_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n')
+_SPACES_RE = re.compile(r'[ \t]+')
+
+# Heading elements; the level is the tag's digit
+_HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+# Pages are parsed once with lexbor (selectolax), which builds and walks large pages
+# several times faster than lxml; elements are found with these CSS selectors
+_HEADINGS = ', '.join(_HEADING_TAGS)
+# Page furniture left out of the extracted content: scripts, styles, navigation,
+# headers and footers, menus, sidebars, ads and social media widgets. Selector lists
+# go in :is(), since lexbor returns an element once per listed selector it matches
+_UNWANTED = (':is(script, style, nav, footer, header, '
+             '.navigation, .nav, .menu, .sidebar, .advertisement, .ads, .social-media)')
+_CONTENT_DIVS = ':is(.columns__item, .content, .main-content, .page-content)'
+# A to Z index links, looked for in these content containers in turn
+_AZ_LINKS = ('main a[href]', '.content a[href]', '.main-content a[href]', '#maincontent a[href]',
+             '.page-content a[href]', 'article a[href]', '.columns a[href]', '.grid a[href]')
+
+def direct_texts(node, tags):
+    """Return the text nodes directly inside `tags` elements at or below node, in document order"""
+    # As XPath's tag/text() would, except that blank nodes are skipped: lexbor keeps
+    # whitespace-only text that lxml dropped, which would count against the limits
+    return [child.text_content for child in node.traverse(include_text=True)
+            if child.tag == '-text' and child.parent.tag in tags and child.text_content.strip()]
+
+# Scrapy's LinkExtractor deny list (documents, media, archives), as endswith suffixes
+_IGNORED_SUFFIXES = tuple('.' + ext for ext in IGNORED_EXTENSIONS)
+
+# Query parameters that only track the visitor and never change the page
+_TRACKING_PARAMS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+                    'gclid', 'fbclid', 'ref')
+
+def url_key(url):
+    """Return a 64-bit key for URL dedup"""
+    # 64-bit keys collide with probability ~n^2/2^65 (about 1e-9 at 200k URLs),
+    # so unlike a Bloom filter nothing is wrongly skipped in practice. Keys are
+    # unsigned and stable across runs, so a job directory can keep them
+    if xxh3_64_intdigest is None:
+        return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+    return xxh3_64_intdigest(url.encode('utf-8'))
+
+def load_keys(path):
+    """Read the url_key() values saved in a job directory's key file"""
+    keys = array('Q')
+    with open(path, 'rb') as f:
+        data = f.read()
+    # A crawl killed mid-write can leave a partial key at the end
+    keys.frombytes(data[:len(data) - len(data) % keys.itemsize])
+    return keys
+
+def spider_settings(concurrent_requests=4, download_delay=1.0, job_dir=None):
+    """Scrapy settings for a BreadthFirstWebSpider crawl"""
+    settings = {
+        'ROBOTSTXT_OBEY': False,
+        'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'LOG_LEVEL': 'INFO',
+        # The basicConfig handler already prints every record; Scrapy's root handler would repeat it
+        'LOG_INSTALL_ROOT_HANDLER': False,
+        'CONCURRENT_REQUESTS': concurrent_requests,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': concurrent_requests,
+        'DOWNLOAD_DELAY': download_delay,
+        # Breadth-first order: shallower requests first, FIFO within a depth
+        'DEPTH_PRIORITY': 1,
+        'SCHEDULER_DISK_QUEUE': 'scrapy.squeues.PickleFifoDiskQueue',
+        'SCHEDULER_MEMORY_QUEUE': 'scrapy.squeues.FifoMemoryQueue',
+        # Hand out requests for the least busy download slot, so a slow host can't
+        # hold the free concurrency slots
+        'SCHEDULER_PRIORITY_QUEUE': 'scrapy.pqueues.DownloaderAwarePriorityQueue',
+        'DNSCACHE_ENABLED': True,
+        'DNSCACHE_SIZE': 10000,
+        'DNS_TIMEOUT': 5,
+        'REACTOR_THREADPOOL_MAXSIZE': 40,  # DNS lookups
+        'COOKIES_ENABLED': False,
+        # HttpCompressionMiddleware advertises every encoding it can decode (br needs brotli)
+        'COMPRESSION_ENABLED': True,
+        'DOWNLOAD_TIMEOUT': 5,
+        'HTTPCACHE_ENABLED': True,
+        'HTTPCACHE_EXPIRATION_SECS': 3600,
+        'RETRY_TIMES': 1,
+        'RETRY_HTTP_CODES': [500, 502, 503, 504, 408, 429],
+        'DOWNLOAD_MAXSIZE': 10 * 1024 * 1024,  # 10MB
+    }
+    if job_dir:
+        # Scrapy keeps the pending request queue and its dupefilter here, so a stopped
+        # crawl resumes instead of starting over
+        settings['JOBDIR'] = job_dir
+    return settings
 
 class BreadthFirstWebSpider(scrapy.Spider):
     name = 'breadth_first_web_spider'
     
+    # Pages between saves of the seen keys to the job directory
+    SEEN_FLUSH_PAGES = 100
+    
     def __init__(self, start_url, max_pages=100, concurrent_requests=16, 
-                 download_delay=0.5, *args, **kwargs):
+                 download_delay=0.5, job_dir=None, *args, **kwargs):
         super(BreadthFirstWebSpider, self).__init__(*args, **kwargs)
         self.start_urls = [start_url]
         self.allowed_domains = [urlparse(start_url).netloc]
+        # Links must be on the start host or one of its subdomains, compared in canonical form
+        self._allowed_netloc = urlsplit(self._canonicalize(start_url)).netloc
+        self._allowed_suffix = '.' + self._allowed_netloc
         self.MAX_PAGES = max_pages
         self.pages_crawled = 0
-        self.visited_urls = set()
         
-        # Breadth-first traversal queues
-        self.current_level_urls = []  # URLs to crawl in current level
-        self.next_level_urls = []     # URLs to crawl in next level
-        self.current_level = 0
-        self.is_processing_level = False
-        self.level_complete = False
-        self.level_urls_processed = 0
-        
-        self.custom_settings = {
-            'ROBOTSTXT_OBEY': False,
-            'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'LOG_LEVEL': 'INFO',
-            'CONCURRENT_REQUESTS': concurrent_requests,
-            'CONCURRENT_REQUESTS_PER_DOMAIN': concurrent_requests,
-            'DOWNLOAD_DELAY': download_delay,
-            'COOKIES_ENABLED': False,
-            'DOWNLOAD_TIMEOUT': 5,
-            'HTTPCACHE_ENABLED': True,
-            'HTTPCACHE_EXPIRATION_SECS': 3600,
-            'RETRY_TIMES': 1,
-            'RETRY_HTTP_CODES': [500, 502, 503, 504, 408, 429],
-            'DOWNLOAD_MAXSIZE': 10 * 1024 * 1024,  # 10MB
+        # Crawl state lives on the spider, so several crawls can share one process;
+        # pages are streamed to results_file, only the first few are kept for the summary
+        self.crawl_stats = {
+            'pages_crawled': 0,
+            'total_urls': 0,
+            'total_content': 0,
+            'errors': 0,
+            'start_time': datetime.now().isoformat(),
+            'end_time': None
         }
+        self.sample_pages = []
+        # Written as .part and renamed by save_results_to_file once the crawl stats are appended
+        self.results_path = f"crawl_results_bfs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        self.results_file = open(self.results_path + '.part', 'wb', buffering=1 << 20)
+        self.visited_urls = set()  # url_key() of every crawled page
+        self.seen = set()  # url_key() of every URL crawled or requested
+        
+        # With a job directory the seen keys are appended to a key file every
+        # SEEN_FLUSH_PAGES pages and on close, and read back when the crawl resumes
+        self.seen_keys_path = os.path.join(job_dir, 'seen_keys') if job_dir else None
+        self._unsaved_keys = []
+        if self.seen_keys_path:
+            os.makedirs(job_dir, exist_ok=True)
+            if os.path.exists(self.seen_keys_path):
+                self.seen.update(load_keys(self.seen_keys_path))
+        
+        # Deepest level reached so far; Scrapy's scheduler orders the levels (DEPTH_PRIORITY)
+        self.current_level = 0
+        
+        self.custom_settings = spider_settings(concurrent_requests, download_delay, job_dir)
 
     def start_requests(self):
-        """Start with the initial URL"""
+        """Start with the initial URL, unless a resumed crawl has already been there"""
         for url in self.start_urls:
+            if url_key(self._canonicalize(url)) in self.seen:
+                self.logger.info("Resuming crawl with %d seen URLs from %s", len(self.seen), self.seen_keys_path)
+                continue
             yield scrapy.Request(
                 url=url,
                 callback=self.parse,
@@ -71,26 +204,75 @@ class BreadthFirstWebSpider(scrapy.Spider):
                 meta={'level': 0}
             )
 
+    async def start(self):
+        """Scrapy 2.13+ entry point; the default one ignores start_requests"""
+        # Scrapy restores spider.state from the job directory; a resumed crawl counts
+        # its earlier pages toward max_pages
+        if self.seen_keys_path:
+            self.pages_crawled = self.state.get('pages_crawled', 0)
+        for request in self.start_requests():
+            yield request
+
+    def _canonicalize(self, url):
+        """Canonical form of a URL so spellings of the same page share one dedup key"""
+        # Tracking parameters are dropped; w3lib then sorts the query, drops the fragment
+        # and lowercases scheme and host, and default ports are dropped here
+        try:
+            parts = urlsplit(canonicalize_url(url_query_cleaner(url, _TRACKING_PARAMS, remove=True)))
+            netloc = parts.netloc
+            if (parts.scheme, parts.port) in (('http', 80), ('https', 443)):
+                netloc = netloc.rsplit(':', 1)[0]
+        except ValueError:
+            return url
+        return urlunsplit((parts.scheme, netloc, parts.path, parts.query, ''))
+
     def parse(self, response):
         """Main parsing method with breadth-first traversal"""
         if self.pages_crawled >= self.MAX_PAGES:
+            # Downloaded while the spider closes at max_pages; a job directory queues the
+            # request again, so a resumed crawl still reaches the page its key marks as seen
+            if self.seen_keys_path:
+                yield response.request.replace(dont_filter=True)
+            return
+        
+        # PDFs, images and other non-HTML files have nothing to extract or follow
+        content_type = response.headers.get(b'Content-Type', b'text/html').lower()
+        if not content_type.startswith((b'text/html', b'application/xhtml')):
+            self.logger.debug("Skipping non-HTML response (%s): %s", content_type.decode('latin-1'), response.url)
             return
             
         level = response.meta.get('level', 0)
+        if level > self.current_level:
+            self.current_level = level
+            self.logger.info("Starting level %d", level)
         self.pages_crawled += 1
-        self.visited_urls.add(response.url)
+        key = url_key(self._canonicalize(response.url))
+        self.visited_urls.add(key)
+        self.mark_seen(key)
+        if self.seen_keys_path:
+            self.state['pages_crawled'] = self.pages_crawled
+            if self.pages_crawled % self.SEEN_FLUSH_PAGES == 0:
+                self.flush_seen_keys()
         
-        # Update global stats
-        crawl_stats['pages_crawled'] = self.pages_crawled
-        crawl_stats['total_urls'] = len(self.visited_urls)
+        # Update crawl stats
+        self.crawl_stats['pages_crawled'] = self.pages_crawled
+        self.crawl_stats['total_urls'] = len(self.visited_urls)
         
         # Progress reporting
-        print(f"📄 Crawling page {self.pages_crawled}/{self.MAX_PAGES} (Level {level}): {response.url}")
+        # Per-page lines are DEBUG (hidden at LOG_LEVEL INFO); progress is logged every 10 pages.
+        # Lazy %-args keep a suppressed message from being formatted at all
+        self.logger.debug("Crawling page %d/%d (level %d): %s", self.pages_crawled, self.MAX_PAGES, level, response.url)
         if self.pages_crawled % 10 == 0:
-            print(f"⏳ Progress: {self.pages_crawled}/{self.MAX_PAGES} pages ({(self.pages_crawled/self.MAX_PAGES)*100:.1f}%)")
+            self.logger.info("Progress: %d/%d pages (%.1f%%)", self.pages_crawled, self.MAX_PAGES,
+                             self.pages_crawled / self.MAX_PAGES * 100)
+        
+        # One sweep over the page's anchors gives both the stored links and the next level
+        # (the page is parsed once here; extraction strips the tree, so links come first)
+        tree = LexborHTMLParser(response.text)
+        stored_links, page_links = self._harvest_anchors(response, tree)
         
         # Extract comprehensive content
-        content_data = self.extract_comprehensive_content(response)
+        content_data = self.extract_comprehensive_content(response, tree, stored_links)
         
         # Store page data
         page_data = {
@@ -101,146 +283,176 @@ class BreadthFirstWebSpider(scrapy.Spider):
             'headings': content_data.get('headings', []),
             'links': content_data.get('links', []),
             'level': level,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': page_timestamp()
         }
-        crawl_results.append(page_data)
+        self.write_page(page_data)
 
-        # Collect all links from this page for next level
-        all_links = response.css('a[href]')
-        page_links = []
-        
-        for link in all_links:
-            href = link.css('::attr(href)').get()
-            if href and not href.startswith('#') and not href.startswith('javascript:'):
-                absolute_url = urljoin(response.url, href)
-                if (self.allowed_domains[0] in absolute_url and 
-                    absolute_url not in self.visited_urls):
-                    page_links.append(absolute_url)
-        
-        # Add links to next level queue (avoid duplicates)
+        # Request the next level right away, skipping anything already crawled or requested
         for url in page_links:
-            if url not in self.next_level_urls:
-                self.next_level_urls.append(url)
-        
-        # Check if we should start processing next level
-        if not self.is_processing_level and self.next_level_urls and self.pages_crawled < self.MAX_PAGES:
-            yield from self.start_next_level()
-
-    def start_next_level(self):
-        """Start processing the next level of URLs"""
-        if not self.next_level_urls or self.pages_crawled >= self.MAX_PAGES:
-            return
-            
-        self.current_level += 1
-        self.is_processing_level = True
-        
-        print(f"🔄 Starting Level {self.current_level} with {len(self.next_level_urls)} URLs")
-        
-        # Process all URLs in next level
-        for url in self.next_level_urls:
-            if self.pages_crawled < self.MAX_PAGES:
+            key = url_key(url)
+            if key not in self.seen:
+                self.mark_seen(key)
                 yield scrapy.Request(
                     url=url,
                     callback=self.parse,
                     errback=self.handle_error,
-                    meta={'level': self.current_level}
+                    meta={'level': level + 1}
                 )
         
-        # Clear the next level queue
-        self.next_level_urls = []
-        self.is_processing_level = False
+        # Closing (rather than dropping later responses) leaves the pending requests
+        # in the job directory's queue for a resumed crawl
+        if self.pages_crawled >= self.MAX_PAGES:
+            raise CloseSpider('max_pages')
 
-    def extract_comprehensive_content(self, response):
-        """Extract comprehensive content for RAG with safety limits"""
+    def _harvest_anchors(self, response, tree):
+        """Return the page links to store and the in-domain URLs for the next level"""
+        stored_links = []
+        frontier_urls = []
+        # Stored links skip the anchors the content extraction strips with the page furniture
+        # (nodes are compared by mem_id; lexbor's == compares the elements' whole HTML)
+        body_id = tree.body.mem_id
+        excluded = {link.mem_id for element in tree.body.css(_UNWANTED) if element.mem_id != body_id
+                    for link in element.css('a[href]')}
+        candidates = 0
+        
+        for link in tree.css('a[href]'):
+            href, text = self.anchor_href_text(link)
+            if not href or href.startswith('#') or href.startswith('javascript:'):
+                if link.mem_id not in excluded:
+                    candidates += 1
+                continue
+            
+            absolute_url = urljoin(response.url, href)
+            canonical_url = self._canonicalize(absolute_url)
+            parts = urlsplit(canonical_url)
+            netloc = parts.netloc
+            # Links to documents, media and archives aren't downloaded at all
+            if ((netloc == self._allowed_netloc or netloc.endswith(self._allowed_suffix)) and
+                    not parts.path.lower().endswith(_IGNORED_SUFFIXES)):
+                frontier_urls.append(canonical_url)
+            
+            # Only the first 50 content anchors are considered for storage
+            if link.mem_id not in excluded and candidates < 50:
+                candidates += 1
+                if text and text.strip():
+                    stored_links.append({
+                        'url': absolute_url,
+                        'text': text.strip()
+                    })
+        
+        # For A to Z index page, store the links in the main content area instead
+        if 'a-to-z-index' in response.url:
+            stored_links = []
+            for selector in _AZ_LINKS:
+                for link in tree.css(selector):
+                    href, text = self.anchor_href_text(link)
+                    if href and text and text.strip():
+                        # Skip navigation, anchor, and external links
+                        if (not href.startswith('#') and 
+                            not href.startswith('javascript:') and
+                            'usm.edu' in href and
+                            len(text.strip()) > 1):  # Avoid single character links
+                            stored_links.append({
+                                'url': urljoin(response.url, href),
+                                'text': text.strip()
+                            })
+                            if len(stored_links) >= 50:
+                                break
+                if len(stored_links) >= 50:
+                    break
+        
+        return stored_links, frontier_urls
+
+    def mark_seen(self, key):
+        """Add a url_key() to seen, and to the next save when there is a job directory"""
+        if self.seen_keys_path and key not in self.seen:
+            self._unsaved_keys.append(key)
+        self.seen.add(key)
+
+    def flush_seen_keys(self):
+        """Append the keys seen since the last save to the job directory's key file"""
+        if not self._unsaved_keys:
+            return
+        with open(self.seen_keys_path, 'ab') as f:
+            array('Q', self._unsaved_keys).tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        self._unsaved_keys = []
+
+    def write_page(self, page_data):
+        """Append one crawled page to the results file"""
+        self.results_file.write(json_line(page_data))
+        self.crawl_stats['total_content'] += page_data['content_length']
+        if len(self.sample_pages) < 5:
+            self.sample_pages.append(page_data)
+
+    def extract_comprehensive_content(self, response, tree, links):
+        """Extract comprehensive content for RAG with safety limits; links come from _harvest_anchors"""
         content_data = {}
         
         try:
             # Extract title
-            title = response.css('title::text').get()
-            if title:
-                title = title.strip()
+            title = tree.css_first('title')
+            title = title.text().strip() if title is not None else None
             content_data['title'] = title or 'No title found'
             
-            # Get main content area, excluding unwanted elements
-            unwanted_selectors = [
-                'script', 'style', 'nav', 'footer', 'header', 
-                '.navigation', '.nav', '.menu', '.sidebar',
-                '.advertisement', '.ads', '.social-media'
-            ]
-            
-            # Remove unwanted elements
-            main_content = response.css('body')
-            for selector in unwanted_selectors:
-                main_content = main_content.css(f'body:not({selector})')
+            # Get main content area: the lexbor body with the unwanted elements removed
+            body = self.strip_unwanted(tree.body)
             
-            # Extract headings with levels
+            # Extract headings with levels in one query over the body, taking each heading's
+            # whole text (nested tags included); listed by level, document order within a level
             headings = []
-            for i in range(1, 7):  # h1 to h6
-                heading_elements = main_content.css(f'h{i}::text').getall()
-                for heading in heading_elements:
-                    if heading.strip():
-                        headings.append({
-                            'level': i,
-                            'text': heading.strip()
-                        })
+            for element in body.css(_HEADINGS):
+                heading = element.text().strip()
+                if heading:
+                    headings.append({
+                        'level': int(element.tag[1]),
+                        'text': heading
+                    })
+            headings.sort(key=lambda heading: heading['level'])
             content_data['headings'] = headings
             
             # Extract paragraphs
             paragraphs = []
-            para_elements = main_content.css('p::text').getall()
+            para_elements = direct_texts(body, ('p',))
             for para in para_elements[:100]:  # Limit to 100 paragraphs
                 if para.strip() and len(para.strip()) > 10:
                     paragraphs.append(para.strip())
             
             # Extract list items
             list_items = []
-            li_elements = main_content.css('li::text').getall()
+            li_elements = direct_texts(body, ('li',))
             for li in li_elements[:200]:  # Limit to 200 list items
                 if li.strip() and len(li.strip()) > 5:
                     list_items.append(li.strip())
             
             # Extract div content (for structured content)
             div_content = []
-            div_elements = main_content.css('div::text').getall()
+            div_elements = direct_texts(body, ('div',))
             for div in div_elements[:50]:  # Limit to 50 divs
                 if div.strip() and len(div.strip()) > 20:
                     div_content.append(div.strip())
             
-            # Combine all text content
-            full_text = ""
-            
-            # Add headings
-            for heading in headings:
-                full_text += f"\n\n{'#' * heading['level']} {heading['text']}\n"
-            
-            # Add paragraphs
-            for para in paragraphs:
-                full_text += f"\n{para}\n"
-            
-            # Add list items
-            for li in list_items:
-                full_text += f"\n• {li}\n"
-            
-            # Add div content
-            for div in div_content:
-                full_text += f"\n{div}\n"
-            
-            # Extract tables
-            tables = main_content.css('table')
-            for table in tables[:10]:  # Limit to 10 tables
-                table_content = self.extract_table_content(table)
-                if table_content:
-                    full_text += f"\n\nTable:\n{table_content}\n"
-            
-            # Extract content from specific divs (like .columns__item)
-            content_divs = main_content.css('.columns__item, .content, .main-content, .page-content')
-            for div in content_divs[:20]:  # Limit to 20 content divs
-                div_content = self.extract_div_content(div)
-                if div_content:
-                    full_text += f"\n\nSection: {div_content}\n"
+            # Combine all text content; pieces are collected and joined once, since
+            # repeated += recopies the whole text. Collection stops as soon as the cleaned
+            # text is sure to pass the 50KB limit, so long pages don't build (or extract
+            # tables and sections for) text that is cut off anyway
+            full_text_parts = []
+            raw_length = 0
+            check_at = 50000
+            for piece in self.text_pieces(headings, paragraphs, list_items, div_content, body):
+                full_text_parts.append(piece)
+                raw_length += len(piece)
+                if raw_length > check_at:
+                    cleaned_length = len(self.clean_text_for_rag(''.join(full_text_parts)))
+                    if cleaned_length > 50000:
+                        break
+                    # Cleaning only ever shrinks text, so the cleaned length can't pass the
+                    # limit before this many more raw characters arrive
+                    check_at = raw_length + 50000 - cleaned_length
             
             # Clean and limit text
-            full_text = self.clean_text_for_rag(full_text)
+            full_text = self.clean_text_for_rag(''.join(full_text_parts))
             
             # Safety limit: 50KB of text
             if len(full_text) > 50000:
@@ -250,59 +462,10 @@ class BreadthFirstWebSpider(scrapy.Spider):
             structured_content = self.structure_content_for_rag(full_text, content_data.get('title', ''))
             content_data['full_text'] = structured_content
             
-            # Extract links for context - prioritize A to Z content links
-            links = []
-            
-            # For A to Z index page, look for links in the main content area
-            if 'a-to-z-index' in response.url:
-                # Look for A to Z links in various content containers
-                content_selectors = [
-                    'main a[href]',
-                    '.content a[href]', 
-                    '.main-content a[href]',
-                    '#maincontent a[href]',
-                    '.page-content a[href]',
-                    'article a[href]',
-                    '.columns a[href]',
-                    '.grid a[href]'
-                ]
-                
-                for selector in content_selectors:
-                    content_links = response.css(selector)
-                    for link in content_links:
-                        href = link.css('::attr(href)').get()
-                        text = link.css('::text').get()
-                        if href and text and text.strip():
-                            # Skip navigation, anchor, and external links
-                            if (not href.startswith('#') and 
-                                not href.startswith('javascript:') and
-                                'usm.edu' in href and
-                                len(text.strip()) > 1):  # Avoid single character links
-                                links.append({
-                                    'url': urljoin(response.url, href),
-                                    'text': text.strip()
-                                })
-                                if len(links) >= 100:  # Limit for A to Z page
-                                    break
-                    if len(links) >= 100:
-                        break
-            else:
-                # For other pages, use the original logic
-                content_links = main_content.css('a[href]')
-                for link in content_links[:50]:
-                    href = link.css('::attr(href)').get()
-                    text = link.css('::text').get()
-                    if href and text and text.strip():
-                        if not href.startswith('#') and not href.startswith('javascript:'):
-                            links.append({
-                                'url': urljoin(response.url, href),
-                                'text': text.strip()
-                            })
-            
-            content_data['links'] = links[:50]  # Limit to 50 total links
+            content_data['links'] = links
             
         except Exception as e:
-            print(f"⚠️  Error extracting content from {response.url}: {str(e)}")
+            self.logger.warning("Error extracting content from %s: %s", response.url, e)
             content_data = {
                 'title': 'Error extracting title',
                 'full_text': f'Error extracting content: {str(e)}',
@@ -312,74 +475,119 @@ class BreadthFirstWebSpider(scrapy.Spider):
         
         return content_data
 
+    def text_pieces(self, headings, paragraphs, list_items, div_content, body):
+        """Yield the page text pieces in order; tables and content divs are only extracted when reached"""
+        # Add headings
+        for heading in headings:
+            yield f"\n\n{'#' * heading['level']} {heading['text']}\n"
+        
+        # Add paragraphs
+        for para in paragraphs:
+            yield f"\n{para}\n"
+        
+        # Add list items
+        for li in list_items:
+            yield f"\n• {li}\n"
+        
+        # Add div content
+        for div in div_content:
+            yield f"\n{div}\n"
+        
+        # Extract tables
+        for table in body.css('table')[:10]:  # Limit to 10 tables
+            table_content = self.extract_table_content(table)
+            if table_content:
+                yield f"\n\nTable:\n{table_content}\n"
+        
+        # Extract content from specific divs (like .columns__item)
+        for div in body.css(_CONTENT_DIVS)[:20]:  # Limit to 20 content divs
+            div_text = self.extract_div_content(div)
+            if div_text:
+                yield f"\n\nSection: {div_text}\n"
+
+    def strip_unwanted(self, body):
+        """Remove the _UNWANTED elements from a lexbor body in place, keeping their tail text"""
+        # Innermost first, so nothing is removed after its ancestor; the body itself stays
+        for element in reversed(body.css(_UNWANTED)):
+            if element.mem_id != body.mem_id:
+                element.decompose()
+        # Rejoin the text that was split around removed elements
+        body.merge_text_nodes()
+        return body
+
+    def anchor_href_text(self, anchor):
+        """Return an <a> element's href and first descendant text"""
+        text = next((node.text_content for node in anchor.traverse(include_text=True) if node.tag == '-text'), None)
+        return anchor.attributes.get('href'), text
+
     def extract_table_content(self, table):
-        """Extract content from table elements"""
+        """Extract content from a lexbor table element"""
         try:
             # Get table headers
-            headers = table.css('th::text').getall()
+            headers = direct_texts(table, ('th',))
             header_text = ' | '.join([h.strip() for h in headers if h.strip()])
             
             # Get table rows
             rows = table.css('tr')
-            table_content = ""
+            table_content = []
             
             if header_text:
-                table_content += f"Table: {header_text}\n"
+                table_content.append(f"Table: {header_text}\n")
             
             for row in rows[1:]:  # Skip header row
-                cells = row.css('td::text').getall()
+                cells = direct_texts(row, ('td',))
                 if len(cells) == 2:
                     # Two-column table - use Key: Value format
                     key = cells[0].strip()
                     value = cells[1].strip()
                     if key and value:
-                        table_content += f"{key}: {value}\n"
+                        table_content.append(f"{key}: {value}\n")
                 elif len(cells) > 2:
                     # Multi-column table - use pipe format
                     row_text = ' | '.join([cell.strip() for cell in cells if cell.strip()])
                     if row_text:
-                        table_content += f"{row_text}\n"
+                        table_content.append(f"{row_text}\n")
             
-            return table_content.strip()
+            return ''.join(table_content).strip()
         except Exception as e:
             return f"Error extracting table: {str(e)}"
 
     def extract_div_content(self, div):
-        """Extract content from specific div elements"""
+        """Extract content from specific lexbor div elements"""
         try:
             # Get heading from div
-            heading = div.css('h1::text, h2::text, h3::text, h4::text, h5::text, h6::text').get()
-            if heading:
-                heading = heading.strip()
+            heading = direct_texts(div, _HEADING_TAGS)
+            heading = heading[0].strip() if heading else None
             
             # Get paragraphs
-            paragraphs = div.css('p::text').getall()
+            paragraphs = direct_texts(div, ('p',))
             para_text = ' '.join([p.strip() for p in paragraphs if p.strip()])
             
             # Get tables
             tables = div.css('table')
-            table_content = ""
+            table_content = []
             for table in tables:
                 table_text = self.extract_table_content(table)
                 if table_text:
-                    table_content += f"\n{table_text}\n"
+                    table_content.append(f"\n{table_text}\n")
+            table_content = ''.join(table_content)
             
             # Get list items
-            list_items = div.css('li::text').getall()
+            list_items = direct_texts(div, ('li',))
             list_text = ' '.join([li.strip() for li in list_items if li.strip()])
             
             # Combine content
-            content = ""
+            content = []
             if heading:
-                content += f"{heading}\n"
+                content.append(f"{heading}\n")
             if para_text:
-                content += f"{para_text}\n"
+                content.append(f"{para_text}\n")
             if table_content:
-                content += f"{table_content}\n"
+                content.append(f"{table_content}\n")
             if list_text:
-                content += f"{list_text}\n"
+                content.append(f"{list_text}\n")
             
-            return content.strip()
+            return ''.join(content).strip()
         except Exception as e:
             return f"Error extracting div content: {str(e)}"
 
@@ -389,9 +597,8 @@ class BreadthFirstWebSpider(scrapy.Spider):
             return ""
         
         # Remove excessive whitespace
-        import re
-        text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)  # Max 2 consecutive newlines
-        text = re.sub(r'[ \t]+', ' ', text)  # Multiple spaces to single space
+        text = _BLANK_LINES_RE.sub('\n\n', text)  # Max 2 consecutive newlines
+        text = _SPACES_RE.sub(' ', text)  # Multiple spaces to single space
         text = text.strip()
         
         return text
@@ -429,76 +636,62 @@ class BreadthFirstWebSpider(scrapy.Spider):
 
     def handle_error(self, failure):
         """Handle request errors"""
-        crawl_stats['errors'] += 1
-        print(f"❌ Error crawling {failure.request.url}: {failure.value}")
+        self.crawl_stats['errors'] += 1
+        self.logger.error("Error crawling %s: %s", failure.request.url, failure.value)
 
     def closed(self, reason):
         """Called when spider closes"""
-        crawl_stats['end_time'] = datetime.now().isoformat()
-        print(f"\n✅ Crawling completed!")
-        print(f"📊 Total pages crawled: {crawl_stats['pages_crawled']}")
-        print(f"🔗 Total unique URLs: {crawl_stats['total_urls']}")
-        print(f"❌ Errors: {crawl_stats['errors']}")
-        print(f"⏱️  Reason: {reason}")
-
-def crawl_website(start_url, max_pages=50, concurrent_requests=4, download_delay=1.0):
-    """Main function to crawl website with breadth-first approach"""
-    global crawl_stats
-    crawl_stats['start_time'] = datetime.now().isoformat()
+        self.crawl_stats['end_time'] = datetime.now().isoformat()
+        self.flush_seen_keys()
+        self.logger.info("Crawling completed (%s): %d pages, %d unique URLs, %d errors", reason,
+                         self.crawl_stats['pages_crawled'], self.crawl_stats['total_urls'], self.crawl_stats['errors'])
+
+def crawl_website(start_url, max_pages=50, concurrent_requests=4, download_delay=1.0, job_dir=None):
+    """Main function to crawl website with breadth-first approach; returns the finished spider"""
     
     print(f"\n🕷️  Starting breadth-first crawl: {start_url}")
     print(f"📊 Max pages: {max_pages}")
     print(f"⚡ Concurrent requests: {concurrent_requests}")
     print(f"⏱️  Download delay: {download_delay}s")
+    if job_dir:
+        print(f"💾 Job directory: {job_dir}")
     print("-" * 50)
     
-    # Configure Scrapy settings
+    # Configure Scrapy settings (spider custom_settings are only read from the class)
     settings = get_project_settings()
-    settings.update({
-        'ROBOTSTXT_OBEY': False,
-        'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'LOG_LEVEL': 'INFO',
-        'CONCURRENT_REQUESTS': concurrent_requests,
-        'CONCURRENT_REQUESTS_PER_DOMAIN': concurrent_requests,
-        'DOWNLOAD_DELAY': download_delay,
-        'COOKIES_ENABLED': False,
-        'DOWNLOAD_TIMEOUT': 5,
-        'HTTPCACHE_ENABLED': True,
-        'HTTPCACHE_EXPIRATION_SECS': 3600,
-        'RETRY_TIMES': 1,
-        'RETRY_HTTP_CODES': [500, 502, 503, 504, 408, 429],
-        'DOWNLOAD_MAXSIZE': 10 * 1024 * 1024,  # 10MB
-    })
+    settings.update(spider_settings(concurrent_requests, download_delay, job_dir))
     
     # Run crawler
     process = CrawlerProcess(settings)
+    crawler = process.create_crawler(BreadthFirstWebSpider)
     process.crawl(
-        BreadthFirstWebSpider,
+        crawler,
         start_url=start_url,
         max_pages=max_pages,
         concurrent_requests=concurrent_requests,
-        download_delay=download_delay
+        download_delay=download_delay,
+        job_dir=job_dir
     )
     process.start()
+    return crawler.spider
 
-def save_results_to_file():
-    """Save crawling results to JSON file"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"crawl_results_bfs_{timestamp}.json"
+def save_results_to_file(spider):
+    """Finish a spider's streamed JSON Lines results: append crawl_stats as the last line and give the file its name"""
+    if spider.results_file is None:
+        print("❌ No crawl results to save")
+        return None
     
-    results = {
-        'crawl_stats': crawl_stats,
-        'pages': crawl_results
-    }
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    spider.results_file.write(json_line({'crawl_stats': spider.crawl_stats}))
+    spider.results_file.close()
+    spider.results_file = None
     
-    print(f"💾 Results saved to: {filename}")
-    return filename
+    os.replace(spider.results_path + '.part', spider.results_path)
+    print(f"💾 Results saved to: {spider.results_path}")
+    return spider.results_path
 
-def display_summary():
-    """Display crawling summary"""
+def display_summary(spider):
+    """Display a spider's crawling summary"""
+    crawl_stats = spider.crawl_stats
     print("\n" + "=" * 60)
     print("📋 CRAWLING SUMMARY")
     print("=" * 60)
@@ -513,11 +706,10 @@ def display_summary():
     print(f"🔗 Unique URLs: {crawl_stats['total_urls']}")
     print(f"❌ Errors: {crawl_stats['errors']}")
     
-    total_content = sum(page.get('content_length', 0) for page in crawl_results)
-    print(f"📝 Total content length: {total_content:,} characters")
+    print(f"📝 Total content length: {crawl_stats['total_content']:,} characters")
     
     print(f"\n📋 Sample pages:")
-    for i, page in enumerate(crawl_results[:5], 1):
+    for i, page in enumerate(spider.sample_pages, 1):
         title = page.get('title', 'No title')[:50] + "..." if len(page.get('title', '')) > 50 else page.get('title', 'No title')
         level = page.get('level', 0)
         print(f"  {i}. {title}")
@@ -554,6 +746,11 @@ def get_user_input():
         return "https://www.usm.edu/a-to-z-index.php", 50, 4, 1.0
 
 if __name__ == "__main__":
+    # --resume keeps the crawl state in jobs/<host>, so an interrupted crawl continues
+    resume = '--resume' in sys.argv
+    if resume:
+        sys.argv.remove('--resume')
+    
     if len(sys.argv) > 1:
         # Command line mode
         start_url = sys.argv[1]
@@ -568,13 +765,14 @@ if __name__ == "__main__":
             start_url, max_pages, concurrent_requests, download_delay = get_user_input()
         except:
             print("⚠️  Interactive input failed. Using command line mode.")
-            print("Usage: python spiderCrawl_bfs.py <URL> [max_pages] [concurrent_requests] [download_delay]")
+            print("Usage: python spiderCrawl_bfs.py <URL> [max_pages] [concurrent_requests] [download_delay] [--resume]")
             print("Example: python spiderCrawl_bfs.py https://www.usm.edu/a-to-z-index.php 100 4 0.5")
             sys.exit(1)
     
     # Run crawler
-    crawl_website(start_url, max_pages, concurrent_requests, download_delay)
+    job_dir = os.path.join('jobs', urlparse(start_url).netloc.replace(':', '_')) if resume else None
+    spider = crawl_website(start_url, max_pages, concurrent_requests, download_delay, job_dir)
     
     # Save results and display summary
-    save_results_to_file()
-    display_summary()
+    save_results_to_file(spider)
+    display_summary(spider)
@@ -1,6 +1,7 @@
 import scrapy
 from scrapy.crawler import CrawlerProcess
 from scrapy.utils.project import get_project_settings
+from selectolax.lexbor import LexborHTMLParser
 from datetime import datetime
 import os
 import json
@@ -15,6 +16,67 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Links inside page navigation: under a <nav>, <header> or <footer>, or under an element
+# whose class contains one of these words (a substring test, as XPath contains() is).
+# lexbor matches the ancestors in C, in one query per page
+_NAV_CLASSES = ('navigation', 'nav', 'menu', 'header', 'footer')
+
+def nav_links_selector(classes):
+    """CSS selector for the links under navigation elements or elements with these class substrings"""
+    # A plain selector list: lexbor mismatches :is() followed by a descendant combinator
+    return ', '.join([f'{tag} a[href]' for tag in ('nav', 'header', 'footer')] +
+                     [f'[class*="{name}"] a[href]' for name in classes])
+
+_NAV_LINKS = nav_links_selector(_NAV_CLASSES)
+# The A to Z index also treats breadcrumbs and skip links as navigation
+_INDEX_NAV_LINKS = nav_links_selector(_NAV_CLASSES + ('breadcrumb', 'skip'))
+
+# Page furniture left out of the extracted content: scripts, styles, navigation,
+# headers and footers, menus, sidebars, ads and social media widgets
+_UNWANTED_TAGS = frozenset(('script', 'style', 'nav', 'footer', 'header'))
+_UNWANTED_CLASSES = frozenset(('navigation', 'nav', 'menu', 'sidebar', 'advertisement', 'ads', 'social-media'))
+_CONTENT_DIV_CLASSES = frozenset(('columns__item', 'content', 'main-content', 'page-content'))
+_TEXT_TAGS = ('p', 'li', 'div', 'th', 'td')
+_HEADING_LEVELS = {f'h{i}': i for i in range(1, 7)}
+
+def walk_content(root):
+    """Collect what content extraction reads under a lexbor element in one walk, in page order"""
+    # texts holds the direct text of each _TEXT_TAGS tag (what tag::text selected), headings
+    # (level, text) pairs; furniture subtrees are skipped whole, blank text is left out
+    texts = {tag: [] for tag in _TEXT_TAGS}
+    headings = []
+    elements = {'table': [], 'tr': [], 'content_div': [], 'a': []}
+    # Nodes are compared by mem_id; lexbor's == compares the elements' whole HTML
+    root_id = root.mem_id
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        tag = node.tag
+        if tag == '-text':
+            text = node.text_content
+            if text.strip():
+                parent_tag = node.parent.tag
+                if parent_tag in texts:
+                    texts[parent_tag].append(text)
+                elif parent_tag in _HEADING_LEVELS:
+                    headings.append((_HEADING_LEVELS[parent_tag], text))
+            continue
+        if tag.startswith('-'):
+            continue
+        
+        attributes = node.attributes
+        classes = attributes['class'].split() if attributes.get('class') else ()
+        if node.mem_id != root_id and (tag in _UNWANTED_TAGS or not _UNWANTED_CLASSES.isdisjoint(classes)):
+            continue
+        if tag in ('table', 'tr'):
+            elements[tag].append(node)
+        elif tag == 'a' and 'href' in attributes:
+            elements['a'].append(node)
+        if not _CONTENT_DIV_CLASSES.isdisjoint(classes):
+            elements['content_div'].append(node)
+        stack.extend(reversed(list(node.iter(include_text=True))))
+    return texts, headings, elements
+
 # Global variables to store crawling results
 crawl_results = []
 crawl_stats = {
@@ -34,12 +96,13 @@ class BreadthFirstWebSpider(scrapy.Spider):
         self.start_urls = [start_url]
         self.allowed_domains = [urlparse(start_url).netloc]
         self.MAX_PAGES = max_pages
+        # Duplicate requests are dropped by Scrapy's dupefilter (request fingerprints),
+        # so the spider keeps no set of visited URLs, only the page count
         self.pages_crawled = 0
-        self.visited_urls = set()
         
-        # Breadth-first traversal queues
-        self.level_0_urls = []  # URLs from A to Z page (Level 0)
-        self.level_1_urls = []  # URLs from Level 0 pages (Level 1)
+        # Breadth-first traversal queues; dicts keep insertion order with O(1) membership tests
+        self.level_0_urls = {}  # URLs from A to Z page (Level 0)
+        self.level_1_urls = {}  # URLs from Level 0 pages (Level 1)
         self.current_level = 0
         self.level_0_complete = False
         self.level_1_complete = False
@@ -70,6 +133,11 @@ class BreadthFirstWebSpider(scrapy.Spider):
                 meta={'level': 0}
             )
 
+    async def start(self):
+        """Scrapy 2.13+ entry point; the default one ignores start_requests"""
+        for request in self.start_requests():
+            yield request
+
     def parse_level_0(self, response):
         """Parse the A to Z index page and collect all department links"""
         if self.pages_crawled >= self.MAX_PAGES:
@@ -77,17 +145,19 @@ class BreadthFirstWebSpider(scrapy.Spider):
             
         level = response.meta.get('level', 0)
         self.pages_crawled += 1
-        self.visited_urls.add(response.url)
         
-        # Update global stats
+        # Update global stats (the dupefilter keeps crawled requests unique)
         crawl_stats['pages_crawled'] = self.pages_crawled
-        crawl_stats['total_urls'] = len(self.visited_urls)
+        crawl_stats['total_urls'] = self.pages_crawled
         
         # Progress reporting
         print(f"📄 Crawling A to Z Index (Level 0): {response.url}")
         
+        # Parse the page once; content and links are both read from the lexbor tree
+        tree = LexborHTMLParser(response.text)
+        
         # Extract comprehensive content
-        content_data = self.extract_comprehensive_content(response)
+        content_data = self.extract_comprehensive_content(response, tree)
         
         # Store page data
         page_data = {
@@ -107,43 +177,22 @@ class BreadthFirstWebSpider(scrapy.Spider):
         
         # Try multiple strategies to find all department links
         # Get ALL links on the page first
-        all_links = response.css('a[href]')
-        print(f"📊 Total links found on page: {len(all_links)}")
+        print(f"📊 Total links found on page: {len(tree.css('a[href]'))}")
         
         # Collect ALL internal links first, then filter navigation
-        all_internal_links = []
-        for link in all_links:
-            href = link.css('::attr(href)').get()
-            text = link.css('::text').get()
-            
-            if href and not href.startswith('#') and not href.startswith('javascript:'):
-                absolute_url = urljoin(response.url, href)
-                if self.allowed_domains[0] in absolute_url and text and len(text.strip()) > 1:
-                    all_internal_links.append((absolute_url, text.strip(), link))
+        all_internal_links = [(absolute_url, text.strip(), is_nav_link)
+                              for absolute_url, text, is_nav_link in self._extract_links(tree, response.url, _INDEX_NAV_LINKS)
+                              if text and len(text.strip()) > 1]
         
         print(f"📊 Internal links with text: {len(all_internal_links)}")
         
         # Filter out obvious navigation links
-        for absolute_url, text, link in all_internal_links:
-            # Check if it's a navigation link
-            is_nav_link = False
-            if (link.xpath('ancestor::nav') or 
-                link.xpath('ancestor::header') or 
-                link.xpath('ancestor::footer') or
-                link.xpath('ancestor::*[contains(@class, "navigation")]') or
-                link.xpath('ancestor::*[contains(@class, "nav")]') or
-                link.xpath('ancestor::*[contains(@class, "menu")]') or
-                link.xpath('ancestor::*[contains(@class, "header")]') or
-                link.xpath('ancestor::*[contains(@class, "footer")]') or
-                link.xpath('ancestor::*[contains(@class, "breadcrumb")]') or
-                link.xpath('ancestor::*[contains(@class, "skip")]')):
-                is_nav_link = True
-            
+        for absolute_url, text, is_nav_link in all_internal_links:
             # Add non-navigation links
             if (not is_nav_link and 
-                absolute_url not in self.visited_urls and
+                absolute_url != response.url and
                 absolute_url not in self.level_0_urls):
-                self.level_0_urls.append(absolute_url)
+                self.level_0_urls[absolute_url] = None
         
         print(f"📊 Links after filtering navigation: {len(self.level_0_urls)}")
         
@@ -161,18 +210,17 @@ class BreadthFirstWebSpider(scrapy.Spider):
             ]
             
             for selector in content_selectors:
-                links = response.css(selector)
+                links = tree.css(selector)
                 for link in links:
-                    href = link.css('::attr(href)').get()
-                    text = link.css('::text').get()
+                    href, text = self.anchor_href_text(link)
                     
                     if href and not href.startswith('#') and not href.startswith('javascript:'):
                         absolute_url = urljoin(response.url, href)
                         if (self.allowed_domains[0] in absolute_url and 
-                            absolute_url not in self.visited_urls and
+                            absolute_url != response.url and
                             absolute_url not in self.level_0_urls and
                             text and len(text.strip()) > 1):
-                            self.level_0_urls.append(absolute_url)
+                            self.level_0_urls[absolute_url] = None
             
             print(f"📊 Total links after permissive search: {len(self.level_0_urls)}")
         
@@ -196,19 +244,21 @@ class BreadthFirstWebSpider(scrapy.Spider):
             
         level = response.meta.get('level', 1)
         self.pages_crawled += 1
-        self.visited_urls.add(response.url)
         
-        # Update global stats
+        # Update global stats (the dupefilter keeps crawled requests unique)
         crawl_stats['pages_crawled'] = self.pages_crawled
-        crawl_stats['total_urls'] = len(self.visited_urls)
+        crawl_stats['total_urls'] = self.pages_crawled
         
         # Progress reporting
         print(f"📄 Crawling department page {self.pages_crawled}/{self.MAX_PAGES} (Level 1): {response.url}")
         if self.pages_crawled % 10 == 0:
             print(f"⏳ Progress: {self.pages_crawled}/{self.MAX_PAGES} pages ({(self.pages_crawled/self.MAX_PAGES)*100:.1f}%)")
         
+        # Parse the page once; content and links are both read from the lexbor tree
+        tree = LexborHTMLParser(response.text)
+        
         # Extract comprehensive content
-        content_data = self.extract_comprehensive_content(response)
+        content_data = self.extract_comprehensive_content(response, tree)
         
         # Store page data
         page_data = {
@@ -224,34 +274,16 @@ class BreadthFirstWebSpider(scrapy.Spider):
         crawl_results.append(page_data)
 
         # Collect content links from this department page (skip navigation links)
-        all_links = response.css('a[href]')
         page_links = []
         
-        for link in all_links:
-            href = link.css('::attr(href)').get()
-            if href and not href.startswith('#') and not href.startswith('javascript:'):
-                # Check if link is in navigation areas (header, footer, nav)
-                is_nav_link = False
-                if (link.xpath('ancestor::nav') or 
-                    link.xpath('ancestor::header') or 
-                    link.xpath('ancestor::footer') or
-                    link.xpath('ancestor::*[contains(@class, "navigation")]') or
-                    link.xpath('ancestor::*[contains(@class, "nav")]') or
-                    link.xpath('ancestor::*[contains(@class, "menu")]') or
-                    link.xpath('ancestor::*[contains(@class, "header")]') or
-                    link.xpath('ancestor::*[contains(@class, "footer")]')):
-                    is_nav_link = True
-                
-                # Only add content links (not navigation links)
-                if not is_nav_link:
-                    absolute_url = urljoin(response.url, href)
-                    if (self.allowed_domains[0] in absolute_url and 
-                        absolute_url not in self.visited_urls and
-                        absolute_url not in self.level_1_urls):
-                        page_links.append(absolute_url)
+        for absolute_url, text, is_nav_link in self._extract_links(tree, response.url, _NAV_LINKS):
+            # Only add content links (not navigation links)
+            if (not is_nav_link and
+                absolute_url not in self.level_1_urls):
+                page_links.append(absolute_url)
         
         # Add links to Level 1 queue
-        self.level_1_urls.extend(page_links)
+        self.level_1_urls.update(dict.fromkeys(page_links))
         
         # Check if we should start Level 2 (be more aggressive about transitioning)
         if (len(self.level_1_urls) > 50 and  # Start Level 2 when we have enough Level 1 URLs
@@ -278,19 +310,21 @@ class BreadthFirstWebSpider(scrapy.Spider):
             
         level = response.meta.get('level', 2)
         self.pages_crawled += 1
-        self.visited_urls.add(response.url)
         
-        # Update global stats
+        # Update global stats (the dupefilter keeps crawled requests unique)
         crawl_stats['pages_crawled'] = self.pages_crawled
-        crawl_stats['total_urls'] = len(self.visited_urls)
+        crawl_stats['total_urls'] = self.pages_crawled
         
         # Progress reporting
         print(f"📄 Crawling Level 2 page {self.pages_crawled}/{self.MAX_PAGES}: {response.url}")
         if self.pages_crawled % 10 == 0:
             print(f"⏳ Progress: {self.pages_crawled}/{self.MAX_PAGES} pages ({(self.pages_crawled/self.MAX_PAGES)*100:.1f}%)")
         
+        # Parse the page once; content and links are both read from the lexbor tree
+        tree = LexborHTMLParser(response.text)
+        
         # Extract comprehensive content
-        content_data = self.extract_comprehensive_content(response)
+        content_data = self.extract_comprehensive_content(response, tree)
         
         # Store page data
         page_data = {
@@ -306,45 +340,41 @@ class BreadthFirstWebSpider(scrapy.Spider):
         crawl_results.append(page_data)
 
         # Continue following content links (skip navigation links)
-        all_links = response.css('a[href]')
-        
-        for link in all_links:
-            href = link.css('::attr(href)').get()
+        for absolute_url, text, is_nav_link in self._extract_links(tree, response.url, _NAV_LINKS):
+            # Only follow content links (not navigation links)
+            if not is_nav_link and self.pages_crawled < self.MAX_PAGES:
+                yield scrapy.Request(
+                    url=absolute_url,
+                    callback=self.parse_level_2,
+                    errback=self.handle_error,
+                    meta={'level': 2}
+                )
+
+    def _extract_links(self, tree, base_url, nav_links_selector):
+        """Return (absolute_url, text, is_nav_link) for each in-domain link of a lexbor tree, in page order"""
+        nav_links = {link.mem_id for link in tree.css(nav_links_selector)}
+        links = []
+        for link in tree.css('a[href]'):
+            href, text = self.anchor_href_text(link)
             if href and not href.startswith('#') and not href.startswith('javascript:'):
-                # Check if link is in navigation areas (header, footer, nav)
-                is_nav_link = False
-                if (link.xpath('ancestor::nav') or 
-                    link.xpath('ancestor::header') or 
-                    link.xpath('ancestor::footer') or
-                    link.xpath('ancestor::*[contains(@class, "navigation")]') or
-                    link.xpath('ancestor::*[contains(@class, "nav")]') or
-                    link.xpath('ancestor::*[contains(@class, "menu")]') or
-                    link.xpath('ancestor::*[contains(@class, "header")]') or
-                    link.xpath('ancestor::*[contains(@class, "footer")]')):
-                    is_nav_link = True
-                
-                # Only follow content links (not navigation links)
-                if not is_nav_link:
-                    absolute_url = urljoin(response.url, href)
-                    if (self.allowed_domains[0] in absolute_url and 
-                        absolute_url not in self.visited_urls and
-                        self.pages_crawled < self.MAX_PAGES):
-                        yield scrapy.Request(
-                            url=absolute_url,
-                            callback=self.parse_level_2,
-                            errback=self.handle_error,
-                            meta={'level': 2}
-                        )
+                absolute_url = urljoin(base_url, href)
+                if self.allowed_domains[0] in absolute_url:
+                    links.append((absolute_url, text, link.mem_id in nav_links))
+        return links
+
+    def anchor_href_text(self, anchor):
+        """Return a lexbor <a> element's href and first descendant text, as ::attr(href) and ::text .get() did"""
+        text = next((node.text_content for node in anchor.traverse(include_text=True) if node.tag == '-text'), None)
+        return anchor.attributes.get('href'), text
 
-    def extract_comprehensive_content(self, response):
+    def extract_comprehensive_content(self, response, tree):
         """Extract comprehensive content for RAG with safety limits"""
         content_data = {}
         
         try:
             # Extract title
-            title = response.css('title::text').get()
-            if title:
-                title = title.strip()
+            title = tree.css_first('title')
+            title = title.text().strip() if title is not None else None
             content_data['title'] = title or 'No title found'
             
             # Use trafilatura for better text extraction
@@ -359,47 +389,35 @@ class BreadthFirstWebSpider(scrapy.Spider):
             except Exception as e:
                 print(f"⚠️  trafilatura extraction failed: {e}, using fallback")
             
-            # Get main content area, excluding unwanted elements
-            unwanted_selectors = [
-                'script', 'style', 'nav', 'footer', 'header', 
-                '.navigation', '.nav', '.menu', '.sidebar',
-                '.advertisement', '.ads', '.social-media'
-            ]
-            
-            # Remove unwanted elements
-            main_content = response.css('body')
-            for selector in unwanted_selectors:
-                main_content = main_content.css(f'body:not({selector})')
+            # Walk the main content area once, skipping unwanted elements
+            texts, heading_texts, elements = walk_content(tree.body)
             
-            # Extract headings with levels
+            # Extract headings with levels (all h1s, then all h2s, ...)
             headings = []
-            for i in range(1, 7):  # h1 to h6
-                heading_elements = main_content.css(f'h{i}::text').getall()
-                for heading in heading_elements:
-                    if heading.strip():
-                        headings.append({
-                            'level': i,
-                            'text': heading.strip()
-                        })
+            for level, heading in sorted(heading_texts, key=lambda heading: heading[0]):
+                headings.append({
+                    'level': level,
+                    'text': heading.strip()
+                })
             content_data['headings'] = headings
             
             # Extract paragraphs
             paragraphs = []
-            para_elements = main_content.css('p::text').getall()
+            para_elements = texts['p']
             for para in para_elements[:100]:  # Limit to 100 paragraphs
                 if para.strip() and len(para.strip()) > 10:
                     paragraphs.append(para.strip())
             
             # Extract list items
             list_items = []
-            li_elements = main_content.css('li::text').getall()
+            li_elements = texts['li']
             for li in li_elements[:200]:  # Limit to 200 list items
                 if li.strip() and len(li.strip()) > 5:
                     list_items.append(li.strip())
             
             # Extract div content (for structured content)
             div_content = []
-            div_elements = main_content.css('div::text').getall()
+            div_elements = texts['div']
             for div in div_elements[:50]:  # Limit to 50 divs
                 if div.strip() and len(div.strip()) > 20:
                     div_content.append(div.strip())
@@ -424,14 +442,14 @@ class BreadthFirstWebSpider(scrapy.Spider):
                 full_text += f"\n{div}\n"
             
             # Extract tables
-            tables = main_content.css('table')
+            tables = elements['table']
             for table in tables[:10]:  # Limit to 10 tables
                 table_content = self.extract_table_content(table)
                 if table_content:
                     full_text += f"\n\nTable:\n{table_content}\n"
             
             # Extract content from specific divs (like .columns__item)
-            content_divs = main_content.css('.columns__item, .content, .main-content, .page-content')
+            content_divs = elements['content_div']
             for div in content_divs[:20]:  # Limit to 20 content divs
                 div_content = self.extract_div_content(div)
                 if div_content:
@@ -450,10 +468,9 @@ class BreadthFirstWebSpider(scrapy.Spider):
             
             # Extract links for context
             links = []
-            content_links = main_content.css('a[href]')
+            content_links = elements['a']
             for link in content_links[:50]:
-                href = link.css('::attr(href)').get()
-                text = link.css('::text').get()
+                href, text = self.anchor_href_text(link)
                 if href and text and text.strip():
                     if not href.startswith('#') and not href.startswith('javascript:'):
                         links.append({
@@ -475,21 +492,23 @@ class BreadthFirstWebSpider(scrapy.Spider):
         return content_data
 
     def extract_table_content(self, table):
-        """Extract content from table elements"""
+        """Extract content from lexbor table elements"""
         try:
+            texts, _, elements = walk_content(table)
+            
             # Get table headers
-            headers = table.css('th::text').getall()
+            headers = texts['th']
             header_text = ' | '.join([h.strip() for h in headers if h.strip()])
             
             # Get table rows
-            rows = table.css('tr')
+            rows = elements['tr']
             table_content = ""
             
             if header_text:
                 table_content += f"Table: {header_text}\n"
             
             for row in rows[1:]:  # Skip header row
-                cells = row.css('td::text').getall()
+                cells = walk_content(row)[0]['td']
                 if len(cells) == 2:
                     # Two-column table - use Key: Value format
                     key = cells[0].strip()
@@ -507,19 +526,19 @@ class BreadthFirstWebSpider(scrapy.Spider):
             return f"Error extracting table: {str(e)}"
 
     def extract_div_content(self, div):
-        """Extract content from specific div elements"""
+        """Extract content from specific lexbor div elements"""
         try:
+            texts, headings, elements = walk_content(div)
+            
             # Get heading from div
-            heading = div.css('h1::text, h2::text, h3::text, h4::text, h5::text, h6::text').get()
-            if heading:
-                heading = heading.strip()
+            heading = headings[0][1].strip() if headings else None
             
             # Get paragraphs
-            paragraphs = div.css('p::text').getall()
+            paragraphs = texts['p']
             para_text = ' '.join([p.strip() for p in paragraphs if p.strip()])
             
             # Get tables
-            tables = div.css('table')
+            tables = elements['table']
             table_content = ""
             for table in tables:
                 table_text = self.extract_table_content(table)
@@ -527,7 +546,7 @@ class BreadthFirstWebSpider(scrapy.Spider):
                     table_content += f"\n{table_text}\n"
             
             # Get list items
-            list_items = div.css('li::text').getall()
+            list_items = texts['li']
             list_text = ' '.join([li.strip() for li in list_items if li.strip()])
             
             # Combine content
@@ -0,0 +1,32 @@
+"""
+Regression checks for the breadth-first spider's link frontier
+"""
+
+import os
+import sys
+
+from scrapy.http import HtmlResponse
+from selectolax.lexbor import LexborHTMLParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'spiderCrawl'))
+
+from spiderCrawl_bfs import BreadthFirstWebSpider
+
+
+def test_frontier_skips_only_dotted_file_extensions(tmp_path, monkeypatch):
+    # The spider streams its results file into the working directory
+    monkeypatch.chdir(tmp_path)
+    spider = BreadthFirstWebSpider('https://www.example.edu/')
+    body = (b'<html><body><main>'
+            b'<a href="/english">English</a> <a href="/maps">Maps</a> '
+            b'<a href="/apply/form">Apply</a> <a href="/file.pdf">Catalog</a> '
+            b'<a href="/photos/Campus.JPG">Campus</a>'
+            b'</main></body></html>')
+    response = HtmlResponse(url='https://www.example.edu/', body=body, encoding='utf-8')
+    try:
+        _, frontier = spider._harvest_anchors(response, LexborHTMLParser(response.text))
+    finally:
+        spider.results_file.close()
+
+    assert frontier == ['https://www.example.edu/english', 'https://www.example.edu/maps',
+                        'https://www.example.edu/apply/form']